@@ -1,5 +1,10 @@
 // PlayerMMO Design Patterns Website JavaScript
 
+// Site root, derived from this script's own URL (assets/js/main.js)
+const siteRoot = document.currentScript
+    ? new URL('../../', document.currentScript.src)
+    : new URL('./', window.location.href);
+
 document.addEventListener('DOMContentLoaded', function() {
     // Mobile Navigation Toggle
     const navToggle = document.getElementById('nav-toggle');
@@ -106,64 +111,187 @@ document.addEventListener('DOMContentLoaded', function() {
         });
     }
     
+    // Site search over the prefix-sharded index written by tools/generate_site.py
+    function createSearchIndex(indexUrl) {
+        const shards = new Map();
+        let pages = null;
+        
+        function fetchJson(name) {
+            return fetch(new URL(name, indexUrl))
+                .then(response => response.ok ? response.json() : null)
+                .catch(() => null);
+        }
+        
+        // Same shard names as shard_name() in generate_site.py
+        function shardName(term) {
+            return Array.from(term).slice(0, 2).map(c => /[a-z0-9]/.test(c) ? c : '_').join('');
+        }
+        
+        function loadShard(name) {
+            if (!shards.has(name)) {
+                shards.set(name, fetchJson(`${name}.json`));
+            }
+            return shards.get(name);
+        }
+        
+        // First position in the sorted terms that is not before the prefix
+        function lowerBound(terms, prefix) {
+            let low = 0;
+            let high = terms.length;
+            while (low < high) {
+                const middle = (low + high) >> 1;
+                if (terms[middle] < prefix) {
+                    low = middle + 1;
+                } else {
+                    high = middle;
+                }
+            }
+            return low;
+        }
+        
+        // Page scores for every term starting with the prefix
+        function lookup(shard, prefix) {
+            const scores = new Map();
+            if (!shard) return scores;
+            const { terms, postings } = shard;
+            for (let i = lowerBound(terms, prefix); i < terms.length && terms[i].startsWith(prefix); i++) {
+                const posting = postings[i];
+                for (let j = 0; j < posting.length; j += 2) {
+                    scores.set(posting[j], (scores.get(posting[j]) || 0) + posting[j + 1]);
+                }
+            }
+            return scores;
+        }
+        
+        // Pages containing every word of the query (as a prefix), best first;
+        // null when the index cannot be loaded or the query has no indexed word
+        async function search(query) {
+            const words = (query.toLowerCase().match(/[\p{L}\p{N}_]+/gu) || [])
+                .filter(word => Array.from(word).length >= 2);
+            if (!words.length) return null;
+            if (!pages) {
+                pages = fetchJson('pages.json');
+            }
+            const pageList = await pages;
+            if (!pageList) {
+                pages = null;
+                return null;
+            }
+            
+            const wordShards = await Promise.all(words.map(word => loadShard(shardName(word))));
+            let totals = null;
+            words.forEach((word, i) => {
+                const scores = lookup(wordShards[i], word);
+                if (totals === null) {
+                    totals = scores;
+                    return;
+                }
+                for (const [page, score] of totals) {
+                    if (scores.has(page)) {
+                        totals.set(page, score + scores.get(page));
+                    } else {
+                        totals.delete(page);
+                    }
+                }
+            });
+            
+            return Array.from(totals)
+                .sort((a, b) => b[1] - a[1])
+                .map(([page, score]) => ({
+                    url: new URL(pageList[page].url, siteRoot).href,
+                    title: pageList[page].title,
+                    score
+                }));
+        }
+        
+        return { search };
+    }
+    
     // Pattern search functionality
     function createPatternSearch() {
+        const patternsSection = document.getElementById('patterns');
+        if (!patternsSection) return;
+        
         const searchInput = document.createElement('input');
         searchInput.type = 'text';
         searchInput.placeholder = 'Search patterns...';
         searchInput.className = 'pattern-search';
         
-        const patternsSection = document.getElementById('patterns');
-        if (patternsSection) {
-            const title = patternsSection.querySelector('.section-title');
-            if (title) {
-                title.parentNode.insertBefore(searchInput, title.nextSibling);
-            }
+        const resultList = document.createElement('ul');
+        resultList.className = 'search-results';
+        
+        const title = patternsSection.querySelector('.section-title');
+        if (title) {
+            title.parentNode.insertBefore(searchInput, title.nextSibling);
+            title.parentNode.insertBefore(resultList, searchInput.nextSibling);
         }
         
-        searchInput.addEventListener('input', function() {
-            const searchTerm = this.value.toLowerCase();
-            const patternTiles = document.querySelectorAll('.pattern-tile');
-            const categoryCards = document.querySelectorAll('.category-card');
-            
+        const searchIndex = createSearchIndex(new URL('assets/search/', siteRoot));
+        const patternTiles = document.querySelectorAll('.pattern-tile');
+        const categoryCards = document.querySelectorAll('.category-card');
+        
+        function showAll() {
+            patternTiles.forEach(tile => { tile.style.display = 'flex'; });
+            categoryCards.forEach(card => { card.style.display = 'block'; });
+            resultList.innerHTML = '';
+        }
+        
+        // Without the index (e.g. opened from disk) or for one-letter
+        // queries, match pattern names only
+        function filterByName(searchTerm) {
             patternTiles.forEach(tile => {
-                const patternName = tile.querySelector('.pattern-name').textContent.toLowerCase();
-                const patternCategory = tile.querySelector('.pattern-category').textContent.toLowerCase();
-                
-                if (patternName.includes(searchTerm) || patternCategory.includes(searchTerm)) {
-                    tile.style.display = 'flex';
-                } else {
-                    tile.style.display = searchTerm === '' ? 'flex' : 'none';
-                }
+                const text = tile.textContent.toLowerCase();
+                tile.style.display = text.includes(searchTerm) ? 'flex' : 'none';
+            });
+            categoryCards.forEach(card => {
+                const text = card.textContent.toLowerCase();
+                card.style.display = text.includes(searchTerm) ? 'block' : 'none';
+            });
+            resultList.innerHTML = '';
+        }
+        
+        function showResults(results) {
+            const matches = new Set(results.map(result => result.url));
+            patternTiles.forEach(tile => {
+                tile.style.display = matches.has(tile.href) ? 'flex' : 'none';
+            });
+            categoryCards.forEach(card => {
+                const links = card.querySelectorAll('a[href]');
+                const hasMatch = Array.from(links).some(link => matches.has(link.href));
+                card.style.display = hasMatch ? 'block' : 'none';
             });
             
-            // Also filter category cards
-            if (searchTerm) {
-                categoryCards.forEach(card => {
-                    const categoryName = card.querySelector('h3').textContent.toLowerCase();
-                    const patternLinks = card.querySelectorAll('.pattern-link');
-                    let hasMatchingPattern = false;
-                    
-                    patternLinks.forEach(link => {
-                        if (link.textContent.toLowerCase().includes(searchTerm)) {
-                            hasMatchingPattern = true;
-                        }
-                    });
-                    
-                    if (categoryName.includes(searchTerm) || hasMatchingPattern) {
-                        card.style.display = 'block';
-                    } else {
-                        card.style.display = 'none';
-                    }
-                });
+            resultList.innerHTML = '';
+            results.slice(0, 8).forEach(result => {
+                const item = document.createElement('li');
+                const link = document.createElement('a');
+                link.href = result.url;
+                link.textContent = result.title;
+                item.appendChild(link);
+                resultList.appendChild(item);
+            });
+        }
+        
+        searchInput.addEventListener('input', async function() {
+            const query = this.value.trim();
+            if (!query) {
+                showAll();
+                return;
+            }
+            
+            const results = await searchIndex.search(query);
+            // A newer query may have finished first
+            if (this.value.trim() !== query) return;
+            
+            if (results === null) {
+                filterByName(query.toLowerCase());
             } else {
-                categoryCards.forEach(card => {
-                    card.style.display = 'block';
-                });
+                showResults(results);
             }
         });
     }
     
+
     // Theme toggle functionality
     function createThemeToggle() {
         const themeToggle = document.createElement('button');
@@ -367,6 +495,19 @@ const additionalStyles = `
         box-shadow: 0 0 0 3px rgba(52, 152, 219, 0.1);
     }
     
+    .search-results {
+        list-style: none;
+        max-width: 400px;
+        margin: -1.5rem auto 2rem;
+        padding: 0;
+    }
+    
+    .search-results li a {
+        display: block;
+        padding: 0.4rem 0.75rem;
+        border-bottom: 1px solid var(--border-color);
+    }
+    
     .theme-toggle {
         background: none;
         border: none;
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Build Tracing
+Records timed spans for each stage of a documentation build and exports them
+as Chrome trace-event JSON (chrome://tracing, Perfetto) or as a summary table
+"""
+
+import os
+import json
+import time
+import threading
+import contextlib
+
+class Tracer:
+    """Collects complete ('X') trace events for stages and documents
+
+    Nothing is kept unless tracing is enabled (--trace), so long-running
+    --watch sessions do not accumulate events. Spans inside collect() are
+    always recorded, for the process that merges them to decide.
+    """
+
+    def __init__(self):
+        self.events = []
+        self.lock = threading.Lock()
+        self.enabled = False
+        self.collecting = 0
+
+    @contextlib.contextmanager
+    def span(self, stage, document=None):
+        """Time the enclosed block as one stage, optionally for one document"""
+        if not (self.enabled or self.collecting):
+            yield
+            return
+        start_us = time.time_ns() // 1000
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            event = {
+                "name": stage,
+                "cat": "build",
+                "ph": "X",
+                "ts": start_us,
+                "dur": round((time.perf_counter() - start) * 1_000_000),
+                "pid": os.getpid(),
+                "tid": threading.get_ident(),
+                "args": {"document": str(document)} if document is not None else {}
+            }
+            with self.lock:
+                self.events.append(event)
+
+    @contextlib.contextmanager
+    def collect(self):
+        """Move the events recorded in the enclosed block into the yielded
+        list, so a worker process can return them with its result"""
+        with self.lock:
+            start = len(self.events)
+            self.collecting += 1
+        collected = []
+        try:
+            yield collected
+        finally:
+            with self.lock:
+                self.collecting -= 1
+                collected.extend(self.events[start:])
+                del self.events[start:]
+
+    def merge(self, events):
+        """Add events recorded elsewhere, e.g. in a worker process"""
+        if not self.enabled:
+            return
+        with self.lock:
+            self.events.extend(events)
+
+    def export_chrome_trace(self, path):
+        """Write the events as Chrome trace-event JSON"""
+        with self.lock:
+            events = sorted(self.events, key=lambda event: event["ts"])
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+
+    def summary(self, limit=10):
+        """Return the summary table of stages and slowest documents as text"""
+        with self.lock:
+            events = list(self.events)
+
+        stages = {}
+        documents = {}
+        for event in events:
+            seconds = event["dur"] / 1_000_000
+            count, total, longest = stages.get(event["name"], (0, 0.0, 0.0))
+            stages[event["name"]] = (count + 1, total + seconds, max(longest, seconds))
+            document = event["args"].get("document")
+            if document is not None:
+                documents[document] = documents.get(document, 0.0) + seconds
+
+        lines = [f"{'Stage':<24} {'Count':>6} {'Total s':>9} {'Mean ms':>9} {'Max ms':>9}"]
+        for name, (count, total, longest) in sorted(stages.items(), key=lambda item: -item[1][1]):
+            lines.append(f"{name:<24} {count:>6} {total:>9.3f} "
+                         f"{total / count * 1000:>9.1f} {longest * 1000:>9.1f}")
+
+        if documents:
+            lines.append("")
+            lines.append(f"{'Slowest documents':<52} {'Total s':>9}")
+            for document, total in sorted(documents.items(), key=lambda item: -item[1])[:limit]:
+                if len(document) > 52:
+                    document = "..." + document[-49:]
+                lines.append(f"{document:<52} {total:>9.3f}")
+        return "\n".join(lines)
+
+    def report(self, trace_path=None):
+        """Print the summary table and write the trace file if requested"""
+        if not self.events:
+            return
+        print("\n⏱️  Build timings")
+        print("=" * 50)
+        print(self.summary())
+        if trace_path:
+            self.export_chrome_trace(trace_path)
+            print(f"\nTrace written to {trace_path} (open in chrome://tracing or ui.perfetto.dev)")
+
+# Tracer shared by everything running in this process
+tracer = Tracer()
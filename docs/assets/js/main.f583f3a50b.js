@@ -0,0 +1,526 @@
+const siteRoot = document.currentScript
+? new URL('../../', document.currentScript.src)
+: new URL('./', window.location.href);
+document.addEventListener('DOMContentLoaded', function() {
+
+const navToggle = document.getElementById('nav-toggle');
+const navMenu = document.querySelector('.nav-menu');
+if (navToggle && navMenu) {
+navToggle.addEventListener('click', function() {
+navMenu.classList.toggle('active');
+
+const spans = navToggle.querySelectorAll('span');
+navToggle.classList.toggle('active');
+if (navToggle.classList.contains('active')) {
+spans[0].style.transform = 'rotate(45deg) translate(5px, 5px)';
+spans[1].style.opacity = '0';
+spans[2].style.transform = 'rotate(-45deg) translate(7px, -6px)';
+} else {
+spans[0].style.transform = '';
+spans[1].style.opacity = '';
+spans[2].style.transform = '';
+}
+});
+
+const navLinks = navMenu.querySelectorAll('a');
+navLinks.forEach(link => {
+link.addEventListener('click', () => {
+navMenu.classList.remove('active');
+navToggle.classList.remove('active');
+const spans = navToggle.querySelectorAll('span');
+spans[0].style.transform = '';
+spans[1].style.opacity = '';
+spans[2].style.transform = '';
+});
+});
+}
+
+const anchorLinks = document.querySelectorAll('a[href^="#"]');
+anchorLinks.forEach(link => {
+link.addEventListener('click', function(e) {
+const href = this.getAttribute('href');
+if (href === '#') return;
+e.preventDefault();
+const target = document.querySelector(href);
+if (target) {
+const navHeight = document.querySelector('.main-nav').offsetHeight;
+const targetPosition = target.offsetTop - navHeight - 20;
+window.scrollTo({
+top: targetPosition,
+behavior: 'smooth'
+});
+}
+});
+});
+
+const observerOptions = {
+threshold: 0.1,
+rootMargin: '0px 0px -50px 0px'
+};
+const observer = new IntersectionObserver(function(entries) {
+entries.forEach(entry => {
+if (entry.isIntersecting) {
+entry.target.classList.add('visible');
+}
+});
+}, observerOptions);
+
+const animatedElements = document.querySelectorAll('.doc-card, .category-card, .pattern-tile, .download-card, .feature-item');
+animatedElements.forEach(el => {
+el.classList.add('fade-in');
+observer.observe(el);
+});
+
+const sections = document.querySelectorAll('section[id]');
+const navLinks = document.querySelectorAll('.nav-menu a[href^="#"]');
+function highlightNavigation() {
+const scrollPosition = window.scrollY + 100;
+sections.forEach(section => {
+const sectionTop = section.offsetTop;
+const sectionHeight = section.offsetHeight;
+const sectionId = section.getAttribute('id');
+if (scrollPosition >= sectionTop && scrollPosition < sectionTop + sectionHeight) {
+navLinks.forEach(link => {
+link.classList.remove('active');
+if (link.getAttribute('href') === `#${sectionId}`) {
+link.classList.add('active');
+}
+});
+}
+});
+}
+
+function createSearchIndex(indexUrl) {
+const shards = new Map();
+let pages = null;
+function fetchJson(name) {
+return fetch(new URL(name, indexUrl))
+.then(response => response.ok ? response.json() : null)
+.catch(() => null);
+}
+
+function shardName(term) {
+return Array.from(term).slice(0, 2).map(c => /[a-z0-9]/.test(c) ? c : '_').join('');
+}
+function loadShard(name) {
+if (!shards.has(name)) {
+shards.set(name, fetchJson(`${name}.json`));
+}
+return shards.get(name);
+}
+
+function lowerBound(terms, prefix) {
+let low = 0;
+let high = terms.length;
+while (low < high) {
+const middle = (low + high) >> 1;
+if (terms[middle] < prefix) {
+low = middle + 1;
+} else {
+high = middle;
+}
+}
+return low;
+}
+
+function lookup(shard, prefix) {
+const scores = new Map();
+if (!shard) return scores;
+const { terms, postings } = shard;
+for (let i = lowerBound(terms, prefix); i < terms.length && terms[i].startsWith(prefix); i++) {
+const posting = postings[i];
+for (let j = 0; j < posting.length; j += 2) {
+scores.set(posting[j], (scores.get(posting[j]) || 0) + posting[j + 1]);
+}
+}
+return scores;
+}
+
+
+async function search(query) {
+const words = (query.toLowerCase().match(/[\p{L}\p{N}_]+/gu) || [])
+.filter(word => Array.from(word).length >= 2);
+if (!words.length) return null;
+if (!pages) {
+pages = fetchJson('pages.json');
+}
+const pageList = await pages;
+if (!pageList) {
+pages = null;
+return null;
+}
+const wordShards = await Promise.all(words.map(word => loadShard(shardName(word))));
+let totals = null;
+words.forEach((word, i) => {
+const scores = lookup(wordShards[i], word);
+if (totals === null) {
+totals = scores;
+return;
+}
+for (const [page, score] of totals) {
+if (scores.has(page)) {
+totals.set(page, score + scores.get(page));
+} else {
+totals.delete(page);
+}
+}
+});
+return Array.from(totals)
+.sort((a, b) => b[1] - a[1])
+.map(([page, score]) => ({
+url: new URL(pageList[page].url, siteRoot).href,
+title: pageList[page].title,
+score
+}));
+}
+return { search };
+}
+
+function createPatternSearch() {
+const patternsSection = document.getElementById('patterns');
+if (!patternsSection) return;
+const searchInput = document.createElement('input');
+searchInput.type = 'text';
+searchInput.placeholder = 'Search patterns...';
+searchInput.className = 'pattern-search';
+const resultList = document.createElement('ul');
+resultList.className = 'search-results';
+const title = patternsSection.querySelector('.section-title');
+if (title) {
+title.parentNode.insertBefore(searchInput, title.nextSibling);
+title.parentNode.insertBefore(resultList, searchInput.nextSibling);
+}
+const searchIndex = createSearchIndex(new URL('assets/search/', siteRoot));
+const patternTiles = document.querySelectorAll('.pattern-tile');
+const categoryCards = document.querySelectorAll('.category-card');
+function showAll() {
+patternTiles.forEach(tile => { tile.style.display = 'flex'; });
+categoryCards.forEach(card => { card.style.display = 'block'; });
+resultList.innerHTML = '';
+}
+
+
+function filterByName(searchTerm) {
+patternTiles.forEach(tile => {
+const text = tile.textContent.toLowerCase();
+tile.style.display = text.includes(searchTerm) ? 'flex' : 'none';
+});
+categoryCards.forEach(card => {
+const text = card.textContent.toLowerCase();
+card.style.display = text.includes(searchTerm) ? 'block' : 'none';
+});
+resultList.innerHTML = '';
+}
+function showResults(results) {
+const matches = new Set(results.map(result => result.url));
+patternTiles.forEach(tile => {
+tile.style.display = matches.has(tile.href) ? 'flex' : 'none';
+});
+categoryCards.forEach(card => {
+const links = card.querySelectorAll('a[href]');
+const hasMatch = Array.from(links).some(link => matches.has(link.href));
+card.style.display = hasMatch ? 'block' : 'none';
+});
+resultList.innerHTML = '';
+results.slice(0, 8).forEach(result => {
+const item = document.createElement('li');
+const link = document.createElement('a');
+link.href = result.url;
+link.textContent = result.title;
+item.appendChild(link);
+resultList.appendChild(item);
+});
+}
+searchInput.addEventListener('input', async function() {
+const query = this.value.trim();
+if (!query) {
+showAll();
+return;
+}
+const results = await searchIndex.search(query);
+
+if (this.value.trim() !== query) return;
+if (results === null) {
+filterByName(query.toLowerCase());
+} else {
+showResults(results);
+}
+});
+}
+
+function createThemeToggle() {
+const themeToggle = document.createElement('button');
+themeToggle.className = 'theme-toggle';
+themeToggle.innerHTML = '🌙';
+themeToggle.setAttribute('aria-label', 'Toggle dark mode');
+const nav = document.querySelector('.nav-content');
+if (nav) {
+nav.appendChild(themeToggle);
+}
+
+const savedTheme = localStorage.getItem('theme');
+if (savedTheme === 'dark') {
+document.body.classList.add('dark-theme');
+themeToggle.innerHTML = '☀️';
+}
+themeToggle.addEventListener('click', function() {
+document.body.classList.toggle('dark-theme');
+if (document.body.classList.contains('dark-theme')) {
+themeToggle.innerHTML = '☀️';
+localStorage.setItem('theme', 'dark');
+} else {
+themeToggle.innerHTML = '🌙';
+localStorage.setItem('theme', 'light');
+}
+});
+}
+
+function initializeTooltips() {
+const patternTiles = document.querySelectorAll('.pattern-tile');
+patternTiles.forEach(tile => {
+const patternName = tile.querySelector('.pattern-name').textContent;
+const descriptions = {
+'Abstract Factory': 'Provides an interface for creating families of related objects',
+'Builder': 'Constructs complex objects step by step',
+'Factory Method': 'Creates objects without specifying their concrete classes',
+'Singleton': 'Ensures a class has only one instance',
+'Command': 'Encapsulates a request as an object',
+'Iterator': 'Provides sequential access to elements of a collection',
+'Observer': 'Defines a one-to-many dependency between objects',
+'State': 'Allows an object to alter its behavior when its state changes',
+'Strategy': 'Defines a family of algorithms and makes them interchangeable',
+'Template Method': 'Defines the skeleton of an algorithm in a base class',
+'Adapter': 'Allows incompatible interfaces to work together',
+'Composite': 'Composes objects into tree structures',
+'Decorator': 'Adds behavior to objects dynamically',
+'Facade': 'Provides a simplified interface to a complex subsystem',
+'Proxy': 'Provides a placeholder or surrogate for another object'
+};
+tile.setAttribute('title', descriptions[patternName] || '');
+});
+}
+
+function createBackToTopButton() {
+const backToTop = document.createElement('button');
+backToTop.className = 'back-to-top';
+backToTop.innerHTML = '↑';
+backToTop.setAttribute('aria-label', 'Back to top');
+document.body.appendChild(backToTop);
+window.addEventListener('scroll', function() {
+if (window.scrollY > 300) {
+backToTop.classList.add('visible');
+} else {
+backToTop.classList.remove('visible');
+}
+});
+backToTop.addEventListener('click', function() {
+window.scrollTo({
+top: 0,
+behavior: 'smooth'
+});
+});
+}
+
+function createProgressIndicator() {
+const progress = document.createElement('div');
+progress.className = 'progress-indicator';
+document.body.appendChild(progress);
+window.addEventListener('scroll', function() {
+const windowHeight = document.documentElement.scrollHeight - window.innerHeight;
+const scrolled = (window.scrollY / windowHeight) * 100;
+progress.style.width = scrolled + '%';
+});
+}
+
+function initializeLazyLoading() {
+const images = document.querySelectorAll('img[data-src]');
+const imageObserver = new IntersectionObserver((entries) => {
+entries.forEach(entry => {
+if (entry.isIntersecting) {
+const img = entry.target;
+img.src = img.dataset.src;
+img.classList.remove('lazy');
+imageObserver.unobserve(img);
+}
+});
+});
+images.forEach(img => imageObserver.observe(img));
+}
+
+function displayPatternStatistics() {
+const stats = {
+creational: document.querySelectorAll('.creational-tile').length,
+behavioral: document.querySelectorAll('.behavioral-tile').length,
+structural: document.querySelectorAll('.structural-tile').length
+};
+
+const categoryCards = document.querySelectorAll('.category-card');
+categoryCards.forEach(card => {
+const countElement = card.querySelector('.pattern-count');
+if (countElement) {
+const categoryType = card.classList.contains('creational') ? 'creational' :
+card.classList.contains('behavioral') ? 'behavioral' : 'structural';
+countElement.textContent = `${stats[categoryType]} Pattern${stats[categoryType] !== 1 ? 's' : ''}`;
+}
+});
+}
+
+window.addEventListener('scroll', highlightNavigation);
+
+createPatternSearch();
+createThemeToggle();
+initializeTooltips();
+createBackToTopButton();
+createProgressIndicator();
+initializeLazyLoading();
+displayPatternStatistics();
+
+document.addEventListener('keydown', function(e) {
+
+if (e.key === 'Escape' && navMenu && navMenu.classList.contains('active')) {
+navMenu.classList.remove('active');
+navToggle.classList.remove('active');
+}
+
+if (e.altKey && !isNaN(e.key)) {
+const num = parseInt(e.key);
+const navItems = document.querySelectorAll('.nav-menu a');
+if (navItems[num - 1]) {
+navItems[num - 1].click();
+}
+}
+});
+
+if ('performance' in window) {
+window.addEventListener('load', function() {
+setTimeout(() => {
+const perfData = performance.getEntriesByType('navigation')[0];
+console.log('Page load time:', perfData.loadEventEnd - perfData.loadEventStart, 'ms');
+}, 0);
+});
+}
+
+window.addEventListener('error', function(e) {
+console.warn('Non-critical error:', e.message);
+});
+console.log('PlayerMMO Design Patterns website initialized successfully!');
+});
+
+const additionalStyles = `
+    .pattern-search {
+        width: 100%;
+        max-width: 400px;
+        margin: 0 auto 2rem;
+        padding: 12px 16px;
+        border: 2px solid var(--border-color);
+        border-radius: var(--border-radius);
+        font-size: 1rem;
+        transition: var(--transition);
+        display: block;
+    }
+    
+    .pattern-search:focus {
+        outline: none;
+        border-color: var(--secondary-color);
+        box-shadow: 0 0 0 3px rgba(52, 152, 219, 0.1);
+    }
+    
+    .search-results {
+        list-style: none;
+        max-width: 400px;
+        margin: -1.5rem auto 2rem;
+        padding: 0;
+    }
+    
+    .search-results li a {
+        display: block;
+        padding: 0.4rem 0.75rem;
+        border-bottom: 1px solid var(--border-color);
+    }
+    
+    .theme-toggle {
+        background: none;
+        border: none;
+        font-size: 1.5rem;
+        cursor: pointer;
+        padding: 0.5rem;
+        border-radius: 50%;
+        transition: var(--transition);
+    }
+    
+    .theme-toggle:hover {
+        background-color: var(--bg-light);
+    }
+    
+    .back-to-top {
+        position: fixed;
+        bottom: 20px;
+        right: 20px;
+        width: 50px;
+        height: 50px;
+        background-color: var(--secondary-color);
+        color: white;
+        border: none;
+        border-radius: 50%;
+        font-size: 1.5rem;
+        cursor: pointer;
+        opacity: 0;
+        visibility: hidden;
+        transition: var(--transition);
+        z-index: 1000;
+    }
+    
+    .back-to-top.visible {
+        opacity: 1;
+        visibility: visible;
+    }
+    
+    .back-to-top:hover {
+        background-color: var(--primary-color);
+        transform: translateY(-2px);
+    }
+    
+    .progress-indicator {
+        position: fixed;
+        top: 0;
+        left: 0;
+        height: 3px;
+        background-color: var(--secondary-color);
+        z-index: 1001;
+        transition: width 0.3s ease;
+    }
+    
+    .nav-menu a.active {
+        background-color: var(--secondary-color);
+        color: white;
+    }
+    
+    .dark-theme {
+        --bg-color: #1a1a1a;
+        --bg-light: #2d2d2d;
+        --bg-dark: #0f0f0f;
+        --text-color: #e0e0e0;
+        --text-light: #b0b0b0;
+        --border-color: #404040;
+    }
+    
+    .lazy {
+        opacity: 0;
+        transition: opacity 0.3s;
+    }
+    
+    @media (max-width: 768px) {
+        .pattern-search {
+            margin: 1rem auto;
+        }
+        
+        .theme-toggle {
+            order: -1;
+            margin-right: 1rem;
+        }
+    }
+`;
+
+const styleSheet = document.createElement('style');
+styleSheet.textContent = additionalStyles;
+document.head.appendChild(styleSheet);
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Syntax Highlighting Cache
+Memoizes Pygments output for code blocks in a size-bounded SQLite cache shared
+by every process and build that renders markdown through codehilite
+"""
+
+import os
+import time
+import hashlib
+from pathlib import Path
+
+# Cache file, shared by every build on this machine
+CACHE_PATH = Path(os.environ.get('XDG_CACHE_HOME', Path.home() / '.cache')) \
+    / 'playermmo-docs' / 'highlight.sqlite3'
+
+# Least recently used entries are evicted above this many bytes of HTML
+MAX_CACHE_BYTES = 32 * 1024 * 1024
+
+# A hit only records its use time if the recorded one is older than this,
+# so warm builds read the cache without writing to it
+USE_TIME_RESOLUTION = 60 * 60
+
+class HighlightCache:
+    """Highlighted HTML keyed by lexer, formatter and code, with LRU eviction
+
+    Any SQLite error disables the cache for the rest of the process, so
+    highlighting never fails because of it.
+    """
+
+    def __init__(self, path=CACHE_PATH, max_bytes=MAX_CACHE_BYTES):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.connection = None
+        self.pid = None
+        self.inherited = []
+        self.disabled = False
+
+    def _connect(self):
+        if self.connection is not None and self.pid != os.getpid():
+            # SQLite connections must not be used across fork; keep the
+            # parent's alive so it is not closed from this process either
+            self.inherited.append(self.connection)
+            self.connection = None
+        if self.connection is None:
+            import sqlite3
+
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=10)
+            # Several worker processes read and write at the same time
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute("""CREATE TABLE IF NOT EXISTS highlights (
+                key TEXT PRIMARY KEY, html TEXT NOT NULL,
+                size INTEGER NOT NULL, used REAL NOT NULL)""")
+            connection.execute("CREATE INDEX IF NOT EXISTS highlights_used ON highlights (used)")
+            connection.commit()
+            self.connection = connection
+            self.pid = os.getpid()
+        return self.connection
+
+    def _run(self, operation, *args):
+        """Run a cache operation, disabling the cache if SQLite fails"""
+        import sqlite3
+
+        if self.disabled:
+            return None
+        try:
+            return operation(self._connect(), *args)
+        except (sqlite3.Error, OSError):
+            self.disabled = True
+            return None
+
+    def get(self, key):
+        """Return the cached HTML for key, or None"""
+        def get(connection, key):
+            row = connection.execute("SELECT html, used FROM highlights WHERE key = ?",
+                                     (key,)).fetchone()
+            if row is None:
+                return None
+            now = time.time()
+            if now - row[1] > USE_TIME_RESOLUTION:
+                with connection:
+                    connection.execute("UPDATE highlights SET used = ? WHERE key = ?",
+                                       (now, key))
+            return row[0]
+        return self._run(get, key)
+
+    def put(self, key, html):
+        """Store HTML for key, evicting the least recently used entries if needed"""
+        def put(connection, key, html):
+            with connection:
+                connection.execute("INSERT OR REPLACE INTO highlights VALUES (?, ?, ?, ?)",
+                                   (key, html, len(html), time.time()))
+                total = connection.execute("SELECT SUM(size) FROM highlights").fetchone()[0]
+                if total > self.max_bytes:
+                    # Free a tenth of the budget at once so eviction stays rare
+                    excess = total - self.max_bytes * 0.9
+                    evicted = []
+                    for old_key, size in connection.execute(
+                            "SELECT key, size FROM highlights ORDER BY used"):
+                        if excess <= 0:
+                            break
+                        evicted.append((old_key,))
+                        excess -= size
+                    connection.executemany("DELETE FROM highlights WHERE key = ?", evicted)
+        self._run(put, key, html)
+
+def cache_key(code, lexer, formatter):
+    """Key a highlight call by Pygments version, lexer, formatter and code"""
+    import pygments
+
+    parts = [
+        pygments.__version__,
+        f"{type(lexer).__module__}.{type(lexer).__qualname__}",
+        repr(sorted(lexer.options.items())),
+        f"{type(formatter).__module__}.{type(formatter).__qualname__}",
+        repr(sorted(formatter.options.items())),
+        code
+    ]
+    return hashlib.sha256('\0'.join(parts).encode('utf-8')).hexdigest()
+
+def make_cached_highlight(highlight, cache):
+    """Wrap pygments.highlight so string results come from the cache"""
+    def cached_highlight(code, lexer, formatter, outfile=None):
+        # Results written to a file or encoded to bytes are not cached
+        if outfile is not None or getattr(formatter, 'encoding', None):
+            return highlight(code, lexer, formatter, outfile)
+        key = cache_key(code, lexer, formatter)
+        html = cache.get(key)
+        if html is None:
+            html = highlight(code, lexer, formatter)
+            cache.put(key, html)
+        return html
+
+    cached_highlight.highlight_cache = cache
+    return cached_highlight
+
+def install_highlight_cache(cache=None):
+    """Route markdown's codehilite (and fenced_code) through the cache
+
+    Safe to call more than once. Returns the cache in use, or None when
+    Pygments is not installed.
+    """
+    from markdown.extensions import codehilite
+
+    highlight = getattr(codehilite, 'highlight', None)
+    if highlight is None:
+        return None
+    if getattr(highlight, 'highlight_cache', None) is not None:
+        return highlight.highlight_cache
+
+    cache = cache or HighlightCache()
+    codehilite.highlight = make_cached_highlight(highlight, cache)
+    return cache
@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+"""
+PDF Generator Benchmark
+Measures the three PDF back ends over the real pattern summaries and over
+synthetic corpora scaled from them, and reports per-stage cost as JSON
+
+Back ends:
+    weasyprint  generate_pdfs.py         (markdown + WeasyPrint)
+    simple      generate_pdfs_simple.py  (regex converter + WeasyPrint)
+    pandoc      generate_pdfs_pandoc.py  (pandoc + xelatex)
+
+Stages:
+    parse   markdown -> HTML fragment (pandoc: markdown -> LaTeX)
+    html    fragment -> complete HTML document
+    layout  HTML -> laid out pages (pandoc: xelatex, run as the generator runs
+            it: from the precompiled preamble, until its aux files settle)
+    write   pages -> PDF file
+
+Without WeasyPrint, the simple back end still measures parse and html.
+
+Each back end and corpus runs in a fresh process so peak RSS is its own.
+
+Run from the repository root:
+    python tools/benchmark_generators.py [--scales 1 10 100] [--output bench.json]
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import shutil
+import asyncio
+import argparse
+import platform
+import tempfile
+import contextlib
+import subprocess
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import generate_pdfs
+
+BACKENDS = ['weasyprint', 'simple', 'pandoc']
+CORPUS_DIR = Path("PlayerMMO/Summaries")
+DEFAULT_SCALES = [1, 10, 100]
+
+def peak_rss_kb(who):
+    """Peak resident set size in KiB for this process or its children"""
+    if resource is None:
+        return None
+    usage = resource.getrusage(who)
+    # ru_maxrss is in bytes on macOS and KiB elsewhere
+    return usage.ru_maxrss // 1024 if sys.platform == 'darwin' else usage.ru_maxrss
+
+def cpu_seconds():
+    """CPU time used by this process and its finished children"""
+    if resource is None:
+        return time.process_time()
+    total = 0.0
+    for who in (resource.RUSAGE_SELF, resource.RUSAGE_CHILDREN):
+        usage = resource.getrusage(who)
+        total += usage.ru_utime + usage.ru_stime
+    return total
+
+class StageTimer:
+    """Accumulates wall time, CPU time, peak RSS and output size per stage"""
+
+    def __init__(self):
+        self.stages = {}
+        # Stages that could not run, with the reason
+        self.skipped = {}
+
+    def measure(self, stage, func, *args):
+        """Run func(*args) as part of a stage and return its result"""
+        wall_start = time.perf_counter()
+        cpu_start = cpu_seconds()
+        result = func(*args)
+        entry = self.stages.setdefault(stage, {
+            "wall_s": 0.0, "cpu_s": 0.0, "peak_rss_kb": None, "output_bytes": 0
+        })
+        entry["wall_s"] += time.perf_counter() - wall_start
+        entry["cpu_s"] += cpu_seconds() - cpu_start
+        if resource is not None:
+            entry["peak_rss_kb"] = max(peak_rss_kb(resource.RUSAGE_SELF),
+                                       peak_rss_kb(resource.RUSAGE_CHILDREN))
+        return result
+
+    def add_output(self, stage, size):
+        self.stages[stage]["output_bytes"] += size
+
+    def report(self):
+        for entry in self.stages.values():
+            entry["wall_s"] = round(entry["wall_s"], 4)
+            entry["cpu_s"] = round(entry["cpu_s"], 4)
+        return self.stages
+
+def module_unavailable(module):
+    """Return why a module cannot be imported, or None if it can"""
+    try:
+        # WeasyPrint prints a banner when its native libraries are missing
+        with contextlib.redirect_stdout(io.StringIO()):
+            __import__(module)
+    except Exception as e:
+        # ... and raises OSError rather than ImportError
+        return f"{module} unavailable: {type(e).__name__}: {e}".splitlines()[0][:160]
+    return None
+
+def backend_unavailable(backend):
+    """Return why a back end cannot run here, or None if it can
+
+    The simple back end's converter is pure Python, so it always runs;
+    only its layout and write stages need WeasyPrint.
+    """
+    if backend == 'pandoc':
+        missing = [tool for tool in ('pandoc', 'xelatex') if shutil.which(tool) is None]
+        return f"not installed: {', '.join(missing)}" if missing else None
+    if backend == 'weasyprint':
+        return module_unavailable('markdown') or module_unavailable('weasyprint')
+    return None
+
+def run_weasyprint(md_files, output_dir, timer):
+    """generate_pdfs.py: markdown + WeasyPrint with the shared renderer"""
+    from weasyprint import HTML
+
+    renderer = generate_pdfs.get_renderer(generate_pdfs.get_css_styles())
+    for md_file in md_files:
+        md_content = md_file.read_text(encoding='utf-8')
+        fragment = timer.measure('parse', generate_pdfs.render_markdown, md_content)
+        timer.add_output('parse', len(fragment.encode('utf-8')))
+        document = timer.measure('html', generate_pdfs.wrap_html_document, fragment, md_file.stem)
+        timer.add_output('html', len(document.encode('utf-8')))
+        pages = timer.measure('layout', renderer.render,
+                              HTML(string=document, base_url=str(md_file.resolve())))
+        pdf_file = output_dir / f"{md_file.stem}.pdf"
+        timer.measure('write', pages.write_pdf, str(pdf_file))
+        timer.add_output('write', pdf_file.stat().st_size)
+
+def run_simple(md_files, output_dir, timer):
+    """generate_pdfs_simple.py: regex converter + WeasyPrint"""
+    import generate_pdfs_simple
+
+    reason = module_unavailable('weasyprint')
+    if reason:
+        timer.skipped.update(layout=reason, write=reason)
+    else:
+        from weasyprint import HTML
+
+    for md_file in md_files:
+        md_content = md_file.read_text(encoding='utf-8')
+        fragment = timer.measure('parse', generate_pdfs_simple.convert_markdown_to_html, md_content)
+        timer.add_output('parse', len(fragment.encode('utf-8')))
+        document = timer.measure('html', generate_pdfs_simple.wrap_html_document,
+                                 fragment, md_file.stem)
+        timer.add_output('html', len(document.encode('utf-8')))
+        if reason:
+            continue
+        pages = timer.measure('layout', HTML(string=document, base_url=str(md_file.resolve())).render)
+        pdf_file = output_dir / f"{md_file.stem}.pdf"
+        timer.measure('write', pages.write_pdf, str(pdf_file))
+        timer.add_output('write', pdf_file.stat().st_size)
+
+def run_pandoc(md_files, output_dir, timer):
+    """generate_pdfs_pandoc.py: pandoc to LaTeX, then xelatex as the generator runs it"""
+    import generate_pdfs_pandoc
+
+    template = generate_pdfs_pandoc.get_pandoc_template()
+    template_path = generate_pdfs_pandoc.create_pandoc_template(output_dir, template)
+    format_name = timer.measure('layout', generate_pdfs_pandoc.build_preamble_format, template)
+
+    for md_file in md_files:
+        build_dir = (output_dir / md_file.stem).resolve()
+        build_dir.mkdir()
+        tex_file = build_dir / f"{md_file.stem}.tex"
+        timer.measure('parse', asyncio.run, generate_pdfs_pandoc.run_command(
+            generate_pdfs_pandoc.pandoc_command(md_file, tex_file, template_path), md_file.stem))
+        timer.add_output('parse', tex_file.stat().st_size)
+        # Images are referenced relative to the markdown file
+        timer.measure('layout', asyncio.run, generate_pdfs_pandoc.typeset_until_stable(
+            tex_file, build_dir, md_file.parent.resolve(), format_name))
+        timer.add_output('layout', (build_dir / f"{md_file.stem}.pdf").stat().st_size)
+
+RUNNERS = {'weasyprint': run_weasyprint, 'simple': run_simple, 'pandoc': run_pandoc}
+
+def run_one(backend, corpus_dir):
+    """Benchmark one back end over one corpus in this process"""
+    md_files = sorted(Path(corpus_dir).glob("*.md"))
+    timer = StageTimer()
+    wall_start = time.perf_counter()
+    cpu_start = cpu_seconds()
+
+    with tempfile.TemporaryDirectory(prefix=f"bench-{backend}-") as output_dir:
+        # Back ends print progress; keep stdout for the JSON result
+        stdout = sys.stdout
+        sys.stdout = sys.stderr
+        try:
+            RUNNERS[backend](md_files, Path(output_dir), timer)
+        finally:
+            sys.stdout = stdout
+
+    result = {
+        "documents": len(md_files),
+        "input_bytes": sum(f.stat().st_size for f in md_files),
+        "stages": timer.report(),
+        "total": {
+            "wall_s": round(time.perf_counter() - wall_start, 4),
+            "cpu_s": round(cpu_seconds() - cpu_start, 4),
+            "peak_rss_kb": peak_rss_kb(resource.RUSAGE_SELF) if resource else None
+        }
+    }
+    if timer.skipped:
+        result["skipped_stages"] = timer.skipped
+    return result
+
+def build_corpus(scale, work_dir):
+    """Return a corpus directory with `scale` copies of every summary"""
+    if scale == 1:
+        return CORPUS_DIR
+    corpus = Path(work_dir) / f"corpus-x{scale}"
+    corpus.mkdir()
+    for md_file in sorted(CORPUS_DIR.glob("*.md")):
+        content = md_file.read_text(encoding='utf-8')
+        for copy in range(scale):
+            (corpus / f"{md_file.stem}_{copy:03d}.md").write_text(content, encoding='utf-8')
+    # Keep relative image links working
+    for image_dir in {image.parent for md_file in CORPUS_DIR.glob("*.md")
+                      for image in generate_pdfs.find_embedded_images(md_file)}:
+        target = corpus.parent / image_dir.name
+        if image_dir.is_dir() and not target.exists():
+            shutil.copytree(image_dir, target)
+    return corpus
+
+def parse_args(argv=None):
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description="Benchmark the PDF generator back ends")
+    parser.add_argument('--backends', nargs='+', choices=BACKENDS, default=BACKENDS)
+    parser.add_argument('--scales', nargs='+', type=int, default=DEFAULT_SCALES,
+                        help="corpus sizes as multiples of PlayerMMO/Summaries")
+    parser.add_argument('--output', '-o', help="write the JSON report here instead of stdout")
+    parser.add_argument('--run-one', nargs=2, metavar=('BACKEND', 'CORPUS'),
+                        help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    """Run every back end over every corpus and emit a JSON report"""
+    args = parse_args(argv)
+
+    if args.run_one:
+        backend, corpus_dir = args.run_one
+        print(json.dumps(run_one(backend, corpus_dir)))
+        return 0
+
+    report = {
+        "machine": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count()
+        },
+        "results": []
+    }
+
+    with tempfile.TemporaryDirectory(prefix="bench-corpus-") as work_dir:
+        for scale in args.scales:
+            corpus = build_corpus(scale, work_dir)
+            for backend in args.backends:
+                result = {"backend": backend, "corpus": f"x{scale}"}
+                reason = backend_unavailable(backend)
+                if reason:
+                    result["skipped"] = reason
+                    print(f"↷ {backend} x{scale}: skipped ({reason})", file=sys.stderr)
+                else:
+                    print(f"⏱  {backend} x{scale}...", file=sys.stderr)
+                    proc = subprocess.run(
+                        [sys.executable, os.path.abspath(__file__),
+                         '--run-one', backend, str(corpus)],
+                        capture_output=True, text=True)
+                    if proc.returncode == 0:
+                        result.update(json.loads(proc.stdout))
+                    else:
+                        result["error"] = proc.stderr.strip().splitlines()[-1:]
+                report["results"].append(result)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(output + "\n", encoding='utf-8')
+        print(f"📊 Report written to {args.output}", file=sys.stderr)
+    else:
+        print(output)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
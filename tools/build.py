@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""
+Unified Documentation Build
+Builds diagrams, PDFs and the docs/ site from one dependency graph, rebuilding
+only what changed
+
+    .puml -> .png -> markdown pages that embed them -> PDFs and site pages
+
+Run from the repository root:
+    python tools/build.py [--jobs N] [--dry-run] [--force] [--precompress]
+"""
+
+import os
+import sys
+import argparse
+from pathlib import Path
+from graphlib import TopologicalSorter
+from concurrent.futures import (ProcessPoolExecutor, ThreadPoolExecutor,
+                                FIRST_COMPLETED, wait)
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import generate_pdfs
+import generate_all_puml_images as puml
+import generate_site
+from build_trace import tracer
+from precompress_site import precompress_site
+
+def node_key(path):
+    """Graph key for a file: its absolute, normalized path"""
+    return os.path.abspath(path)
+
+def build_graph(pdf_output_dir):
+    """Collect the build targets and their dependencies
+
+    Returns (targets, graph): targets maps a key to its description and
+    graph maps each key to the keys it depends on.
+    """
+    targets = {}
+    graph = {}
+
+    # Diagrams: .puml (and its includes) -> .png
+    for puml_path in puml.find_puml_files([puml.ROOT]):
+        key = node_key(puml.image_path_for(puml_path))
+        targets[key] = {"kind": "diagram", "source": puml_path, "output": key}
+        graph[key] = set()
+
+    # PDFs: markdown (and the images it embeds) -> .pdf
+    for section in generate_pdfs.get_sections(pdf_output_dir):
+        source_path = Path(section["source"])
+        if not source_path.exists():
+            continue
+        for md_file in sorted(source_path.glob("*.md")):
+            pdf_file = Path(section["output"]) / f"{md_file.stem}.pdf"
+            key = node_key(pdf_file)
+            targets[key] = {
+                "kind": "pdf",
+                "source": md_file,
+                "output": pdf_file,
+                "output_path": Path(section["output"])
+            }
+            graph[key] = {node_key(image) for image in generate_pdfs.find_embedded_images(md_file)
+                          if node_key(image) in targets}
+
+    # Site pages: markdown (and the images it embeds) -> docs/*.html
+    for page in generate_site.get_site_pages():
+        key = node_key(generate_site.SITE_DIR / page["output"])
+        targets[key] = {"kind": "page", "source": page["source"], "page": page}
+        graph[key] = {node_key(image) for image in generate_site.find_linked_files(page["source"])
+                      if node_key(image) in targets}
+
+    return targets, graph
+
+class Builder:
+    """Walks the dependency graph in topological order, rebuilding stale targets"""
+
+    def __init__(self, targets, graph, args, pdf_output_dir):
+        self.targets = targets
+        self.graph = graph
+        self.args = args
+        self.css_content = generate_pdfs.get_css_styles()
+        self.build_inputs = generate_pdfs.compute_build_inputs(self.css_content)
+        self.manifest_path = pdf_output_dir / generate_pdfs.MANIFEST_NAME
+        self.manifest = generate_pdfs.load_build_manifest(
+            os.devnull if args.force else self.manifest_path)
+        self.fingerprints = puml.load_fingerprints()
+        self.renderer_id = puml.get_renderer_id(args.jar, args.server)
+        self.site = generate_site.Site(force=args.force)
+        self.diagram_jobs = args.jobs
+        self.rebuilt = set()
+        self.failed = set()
+
+    def is_stale(self, key):
+        """Check a target whose dependencies are already built
+
+        A PDF's fingerprint covers the images it embeds, so it is only
+        rebuilt when a rebuilt diagram actually changed.
+        """
+        target = self.targets[key]
+        if self.args.force:
+            return True
+        if target["kind"] == "diagram":
+            return puml.stale_reason(target["source"], self.fingerprints,
+                                     self.renderer_id) is not None
+        if target["kind"] == "page":
+            return self.site.is_stale(target["page"])
+        pdf_key = target["output"].as_posix()
+        fingerprint = generate_pdfs.compute_document_fingerprint(
+            target["source"], self.build_inputs)
+        return not (target["output"].exists()
+                    and self.manifest["documents"].get(pdf_key) == fingerprint)
+
+    def split_jobs(self):
+        """Share --jobs between the PDF workers and the PlantUML processes
+
+        Diagrams render while PDFs that do not embed them are laid out, so
+        with local diagrams to render each side gets part of the jobs.
+        Returns (pdf_jobs, diagram_jobs).
+        """
+        jobs = self.args.jobs
+        renders_locally = not self.args.server and self.renderer_id is not None
+        if not renders_locally or not any(target["kind"] == "diagram" and self.is_stale(key)
+                                          for key, target in self.targets.items()):
+            return jobs, jobs
+        diagram_jobs = max(1, jobs // 2)
+        return max(1, jobs - diagram_jobs), diagram_jobs
+
+    def render_diagrams(self, keys):
+        """Render a group of diagrams with one pool of PlantUML processes"""
+        sources = [self.targets[key]["source"] for key in keys]
+        if self.args.server:
+            return puml.render_with_server(sources, self.args.server, self.diagram_jobs)
+        if self.renderer_id is None:
+            return [(source, f"PlantUML jar not found: {self.args.jar}") for source in sources]
+        return puml.render_with_jar(sources, self.args.jar, self.diagram_jobs)
+
+    def finish_diagrams(self, results):
+        """Record the outcome of a diagram group"""
+        for source, error in results:
+            key = node_key(puml.image_path_for(source))
+            if error:
+                self.failed.add(key)
+                print(f"✗ Error rendering {puml.relative_key(source)}: {error}")
+            else:
+                self.rebuilt.add(key)
+                self.fingerprints["diagrams"][puml.relative_key(source)] = \
+                    puml.compute_fingerprint(source, self.renderer_id)
+                print(f"✓ Rendered: {puml.relative_key(puml.image_path_for(source))}")
+            yield key
+
+    def finish_pdf(self, key, success, log, spans):
+        """Record the outcome of one PDF"""
+        target = self.targets[key]
+        print(log, end='')
+        tracer.merge(spans)
+        pdf_key = target["output"].as_posix()
+        if success:
+            self.rebuilt.add(key)
+            # Fingerprint again: embedded images may have been rebuilt meanwhile
+            self.manifest["documents"][pdf_key] = generate_pdfs.compute_document_fingerprint(
+                target["source"], self.build_inputs)
+        else:
+            self.failed.add(key)
+            self.manifest["documents"].pop(pdf_key, None)
+
+    def build_page(self, key):
+        """Generate one site page; pages are cheap, so this runs inline"""
+        page = self.targets[key]["page"]
+        try:
+            self.site.build_page(page)
+            self.rebuilt.add(key)
+            print(f"✓ Generated: {self.site.output_path(page)}")
+        except Exception as e:
+            self.failed.add(key)
+            print(f"✗ Error generating {self.site.output_path(page)}: {e}")
+
+    def dry_run(self):
+        """Print the targets that would be rebuilt, in build order"""
+        order = TopologicalSorter(self.graph).static_order()
+        stale = []
+        for key in order:
+            # Dependents of a stale target are assumed to change with it
+            if any(dep in stale for dep in self.graph[key]) or self.is_stale(key):
+                stale.append(key)
+        for key in stale:
+            target = self.targets[key]
+            print(f"  {target['kind']:8} {os.path.relpath(key)}")
+        print(f"{len(stale)} of {len(self.targets)} targets would be rebuilt")
+        return 0
+
+    def run(self):
+        """Build every stale target, running independent targets in parallel"""
+        pdf_jobs, self.diagram_jobs = self.split_jobs()
+        sorter = TopologicalSorter(self.graph)
+        sorter.prepare()
+
+        pdf_pool = ProcessPoolExecutor(max_workers=pdf_jobs)
+        diagram_pool = ThreadPoolExecutor(max_workers=1)
+        pending = {}
+        self.site.prepare()
+
+        try:
+            while sorter.is_active():
+                diagrams = []
+                for key in sorter.get_ready():
+                    if not self.is_stale(key):
+                        sorter.done(key)
+                        continue
+                    target = self.targets[key]
+                    if target["kind"] == "diagram":
+                        diagrams.append(key)
+                    elif target["kind"] == "page":
+                        self.build_page(key)
+                        sorter.done(key)
+                    else:
+                        future = pdf_pool.submit(generate_pdfs.render_document,
+                                                 target["source"], target["output_path"],
+                                                 self.css_content)
+                        pending[future] = ("pdf", key)
+
+                # Ready diagrams render together so they share PlantUML processes
+                if diagrams:
+                    future = diagram_pool.submit(self.render_diagrams, diagrams)
+                    pending[future] = ("diagrams", diagrams)
+
+                if not pending:
+                    continue
+
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    kind, payload = pending.pop(future)
+                    if kind == "diagrams":
+                        for key in self.finish_diagrams(future.result()):
+                            sorter.done(key)
+                    else:
+                        try:
+                            success, log, spans = future.result()
+                        except Exception as e:
+                            success, log, spans = False, f"✗ Error processing {payload}: {e}\n", []
+                        self.finish_pdf(payload, success, log, spans)
+                        sorter.done(payload)
+            self.site.finish()
+        finally:
+            pdf_pool.shutdown()
+            diagram_pool.shutdown()
+            generate_pdfs.save_build_manifest(self.manifest_path, self.manifest)
+            self.site.save()
+            if any(self.targets[key]["kind"] == "diagram" for key in self.rebuilt):
+                puml.save_fingerprints(self.fingerprints)
+
+        print(f"\n📊 Rebuilt {len(self.rebuilt)}, failed {len(self.failed)}, "
+              f"up to date {len(self.targets) - len(self.rebuilt) - len(self.failed)}")
+        return 1 if self.failed else 0
+
+def parse_args(argv=None):
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(
+        description="Build diagrams, PDFs and site pages, rebuilding only what changed")
+    parser.add_argument('--jobs', '-j', type=int, default=os.cpu_count() or 1, metavar='N',
+                        help="number of parallel workers")
+    parser.add_argument('--force', action='store_true',
+                        help="rebuild every target")
+    parser.add_argument('--dry-run', '-n', action='store_true',
+                        help="list the targets that would be rebuilt and stop")
+    parser.add_argument('--jar', default=puml.PLANTUML_JAR,
+                        help="path to plantuml.jar")
+    parser.add_argument('--server', nargs='?', const=puml.PLANTUML_SERVER, default=None,
+                        metavar='URL', help="render diagrams through a PlantUML server")
+    parser.add_argument('--precompress', action='store_true',
+                        help="finish by writing gzip and brotli copies of the changed site files")
+    parser.add_argument('--trace', metavar='FILE',
+                        help="print per-stage timings and write a Chrome trace-event JSON file")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    """Build everything that is out of date"""
+    args = parse_args(argv)
+    tracer.enabled = bool(args.trace)
+    args.jobs = max(1, args.jobs)
+
+    pdf_output_dir = Path("PDFs")
+    pdf_output_dir.mkdir(exist_ok=True)
+
+    targets, graph = build_graph(pdf_output_dir)
+    builder = Builder(targets, graph, args, pdf_output_dir)
+
+    if args.dry_run:
+        return builder.dry_run()
+    status = builder.run()
+    if args.precompress and precompress_site(args.jobs):
+        status = 1
+    if args.trace:
+        tracer.report(args.trace)
+    return status
+
+if __name__ == "__main__":
+    sys.exit(main())
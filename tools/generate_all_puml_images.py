@@ -1,29 +1,392 @@
+#!/usr/bin/env python3
+"""
+PlantUML Image Generator
+Renders every .puml diagram in the repository to a .png with the same basename
+"""
+
 import os
-from plantuml import PlantUML
+import re
+import sys
+import json
+import hashlib
+import argparse
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+from build_trace import tracer
+
+# Path to your plantuml.jar (override with the PLANTUML_JAR environment variable)
+PLANTUML_JAR = os.environ.get('PLANTUML_JAR', os.path.expanduser('~/plantuml.jar'))
+
+# Public PlantUML server, only used with --server
+PLANTUML_SERVER = 'http://www.plantuml.com/plantuml/img/'
 
-# Path to your plantuml.jar (update if needed)
-PLANTUML_JAR = os.path.expanduser('~/plantuml.jar')
-# Or set to the path where you downloaded plantuml.jar
+# Root directory containing all .puml files (the repository root)
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 
-# Root directory containing all .puml files
-ROOT = os.path.join(os.path.dirname(__file__), '.')
+# Directories that never contain diagram sources
+SKIP_DIRS = {'.git', '.vs', 'bin', 'obj', 'PDFs', 'node_modules'}
 
 # Extensions and output format
 PUML_EXT = '.puml'
 IMG_EXT = '.png'
 
-# Create PlantUML server instance (local jar)
-server = PlantUML(url='http://www.plantuml.com/plantuml/img/')
-
-# Walk through all subfolders and convert .puml to .png with same basename
-for dirpath, _, filenames in os.walk(ROOT):
-    for fname in filenames:
-        if fname.endswith(PUML_EXT):
-            puml_path = os.path.join(dirpath, fname)
-            img_path = os.path.splitext(puml_path)[0] + IMG_EXT
-            try:
-                server.processes_file(puml_path, outfile=img_path)
-                print(f"Generated: {img_path}")
-            except Exception as e:
-                print(f"Error processing {puml_path}: {e}")
-                continue
+# Separator PlantUML writes between images in -pipe mode
+PIPE_DELIMITER = '___PLANTUML_IMAGE_END___'
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+# Fingerprints of the sources each .png was rendered from (commit with the images)
+FINGERPRINT_FILE = os.path.join(ROOT, 'puml_fingerprints.json')
+FINGERPRINT_VERSION = 1
+
+# !include, !include_many, !include_once and !includesub directives
+INCLUDE_PATTERN = re.compile(rb'^\s*!include(?:_many|_once|sub)?\s+(.+?)\s*$', re.MULTILINE)
+
+def find_puml_files(roots):
+    """Return every .puml file below the given roots, sorted"""
+    puml_files = []
+    for root in roots:
+        for dirpath, dirnames, filenames in os.walk(root):
+            dirnames[:] = [d for d in dirnames if d not in SKIP_DIRS]
+            for fname in filenames:
+                if fname.endswith(PUML_EXT):
+                    puml_files.append(os.path.join(dirpath, fname))
+    return sorted(puml_files)
+
+def image_path_for(puml_path):
+    """Return the .png path that belongs to a .puml file"""
+    return os.path.splitext(puml_path)[0] + IMG_EXT
+
+def read_diagram(puml_path):
+    """Read a diagram source as bytes"""
+    with open(puml_path, 'rb') as f:
+        return f.read()
+
+def has_includes(source):
+    """Check whether a diagram pulls in other files"""
+    return b'!include' in source
+
+def write_image(img_path, data):
+    """Write an image atomically so readers never see a partial file"""
+    temp_path = img_path + '.tmp'
+    with open(temp_path, 'wb') as f:
+        f.write(data)
+    os.replace(temp_path, img_path)
+
+def hash_bytes(data):
+    """Return the SHA-256 hex digest of some bytes"""
+    return hashlib.sha256(data).hexdigest()
+
+def relative_key(path):
+    """Return a stable, platform independent key for a path"""
+    return os.path.relpath(path, ROOT).replace(os.sep, '/')
+
+def find_includes(puml_path, seen=None):
+    """Return every local file a diagram includes, following nested includes
+
+    URLs and standard library includes (<...>) are not files in the
+    repository and are left out.
+    """
+    seen = set() if seen is None else seen
+    includes = []
+    try:
+        source = read_diagram(puml_path)
+    except OSError:
+        return includes
+
+    for match in INCLUDE_PATTERN.finditer(source):
+        target = match.group(1).decode('utf-8', errors='replace')
+        if target.startswith(('<', 'http:', 'https:')):
+            continue
+        # !includesub file!PART and !include file!N name a part of the file
+        target = target.split('!')[0]
+        include_path = os.path.normpath(os.path.join(os.path.dirname(puml_path), target))
+        if include_path in seen:
+            continue
+        seen.add(include_path)
+        includes.append(include_path)
+        includes.extend(find_includes(include_path, seen))
+    return includes
+
+def get_renderer_id(jar_path=None, server_url=None):
+    """Identify the renderer, or return None when it cannot be determined"""
+    if server_url:
+        return f"server:{server_url}"
+    if jar_path and os.path.isfile(jar_path):
+        with open(jar_path, 'rb') as f:
+            return f"jar:{hash_bytes(f.read())}"
+    return None
+
+def compute_fingerprint(puml_path, renderer_id):
+    """Fingerprint a diagram from its source, its includes and the renderer"""
+    includes = {}
+    for include_path in find_includes(puml_path):
+        try:
+            includes[relative_key(include_path)] = hash_bytes(read_diagram(include_path))
+        except OSError:
+            includes[relative_key(include_path)] = None
+    return {
+        "source": hash_bytes(read_diagram(puml_path)),
+        "includes": includes,
+        "renderer": renderer_id
+    }
+
+def load_fingerprints(path=FINGERPRINT_FILE):
+    """Load recorded fingerprints, starting fresh if missing or unreadable"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get("version") == FINGERPRINT_VERSION:
+            return data
+    except (OSError, ValueError):
+        pass
+    return {"version": FINGERPRINT_VERSION, "diagrams": {}}
+
+def save_fingerprints(data, path=FINGERPRINT_FILE):
+    """Write fingerprints atomically, sorted so diffs stay small"""
+    temp_path = path + '.tmp'
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+        f.write('\n')
+    os.replace(temp_path, path)
+
+def stale_reason(puml_path, fingerprints, renderer_id):
+    """Explain why a diagram needs rendering, or return None if it is current
+
+    When renderer_id is None (no renderer available, e.g. in --check on CI)
+    the renderer is not compared, nor is it for fingerprints recorded by
+    --seed, which do not know the renderer of the existing image.
+    """
+    if not os.path.exists(image_path_for(puml_path)):
+        return "image missing"
+    recorded = fingerprints["diagrams"].get(relative_key(puml_path))
+    if recorded is None:
+        return "no fingerprint"
+    current = compute_fingerprint(puml_path, renderer_id)
+    if recorded.get("source") != current["source"]:
+        return "source changed"
+    if recorded.get("includes") != current["includes"]:
+        return "include changed"
+    if renderer_id is not None and recorded.get("renderer") not in (None, renderer_id):
+        return "renderer changed"
+    return None
+
+def plan_batches(puml_files, jobs):
+    """Split diagrams into batches, one PlantUML process per batch
+
+    Diagrams without !include are spread evenly over the workers. Diagrams
+    with !include are grouped by directory and rendered with that directory
+    as the working directory, so their relative includes resolve.
+    """
+    plain = [[] for _ in range(max(1, jobs))]
+    by_directory = {}
+    index = 0
+
+    for puml_path in puml_files:
+        if has_includes(read_diagram(puml_path)):
+            by_directory.setdefault(os.path.dirname(puml_path), []).append(puml_path)
+        else:
+            plain[index % len(plain)].append(puml_path)
+            index += 1
+
+    batches = [(None, batch) for batch in plain if batch]
+    batches.extend(sorted(by_directory.items()))
+    return batches
+
+def run_plantuml_pipe(jar_path, puml_files, cwd=None):
+    """Render several diagrams with one JVM using PlantUML's -pipe mode
+
+    Returns a dict mapping each .puml path to its PNG bytes, or raises
+    RuntimeError when PlantUML reports an error for the batch.
+    """
+    sources = []
+    expected = []
+    for puml_path in puml_files:
+        source = read_diagram(puml_path)
+        sources.append(source if source.endswith(b'\n') else source + b'\n')
+        expected.append(max(1, source.count(b'@startuml')))
+
+    cmd = [
+        'java', '-Djava.awt.headless=true', '-jar', jar_path,
+        '-tpng', '-charset', 'UTF-8',
+        '-pipe', '-pipedelimitor', PIPE_DELIMITER
+    ]
+    # A batch is one span; name it after its diagram when it has only one
+    document = relative_key(puml_files[0])
+    if len(puml_files) > 1:
+        document = f"{len(puml_files)} diagrams from {document}"
+    with tracer.span("puml render", document):
+        result = subprocess.run(cmd, input=b''.join(sources), cwd=cwd,
+                                capture_output=True)
+
+    stderr = ' '.join(result.stderr.decode('utf-8', errors='replace').split())
+    if result.returncode != 0 or 'ERROR' in stderr:
+        raise RuntimeError(stderr or f"plantuml exited with code {result.returncode}")
+
+    images = [chunk.lstrip(b'\r\n')
+              for chunk in result.stdout.split(PIPE_DELIMITER.encode('ascii'))]
+    images = [image for image in images if image]
+    if len(images) != sum(expected):
+        raise RuntimeError(f"expected {sum(expected)} images, got {len(images)}")
+
+    # A file with several @startuml blocks keeps its first image
+    rendered = {}
+    position = 0
+    for puml_path, count in zip(puml_files, expected):
+        image = images[position]
+        if not image.startswith(PNG_SIGNATURE):
+            raise RuntimeError(f"{puml_path} did not render to PNG")
+        rendered[puml_path] = image
+        position += count
+    return rendered
+
+def render_batch(jar_path, cwd, puml_files):
+    """Render a batch, falling back to one process per diagram on errors
+
+    Returns a list of (puml_path, error message or None).
+    """
+    try:
+        rendered = run_plantuml_pipe(jar_path, puml_files, cwd=cwd)
+    except (OSError, RuntimeError) as e:
+        if len(puml_files) == 1:
+            return [(puml_files[0], str(e))]
+        # Find the broken diagram(s) without losing the good ones
+        results = []
+        for puml_path in puml_files:
+            results.extend(render_batch(jar_path, cwd, [puml_path]))
+        return results
+
+    results = []
+    for puml_path, image in rendered.items():
+        write_image(image_path_for(puml_path), image)
+        results.append((puml_path, None))
+    return results
+
+def render_with_jar(puml_files, jar_path, jobs):
+    """Render diagrams offline with the local PlantUML jar"""
+    batches = plan_batches(puml_files, jobs)
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as executor:
+        futures = [executor.submit(render_batch, jar_path, cwd, batch)
+                   for cwd, batch in batches]
+        results = [result for future in futures for result in future.result()]
+    return sorted(results)
+
+def render_with_server(puml_files, server_url, jobs):
+    """Render diagrams through a PlantUML server"""
+    from plantuml import PlantUML
+
+    server = PlantUML(url=server_url)
+
+    def render(puml_path):
+        try:
+            with tracer.span("puml render", relative_key(puml_path)):
+                rendered = server.processes_file(puml_path, outfile=image_path_for(puml_path))
+            if not rendered:
+                return puml_path, "server returned an error"
+            return puml_path, None
+        except Exception as e:
+            return puml_path, str(e)
+
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as executor:
+        return sorted(executor.map(render, puml_files))
+
+def parse_args(argv=None):
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(
+        description="Render .puml diagrams to .png images next to their sources")
+    parser.add_argument('roots', nargs='*', default=[ROOT],
+                        help="directories to search for .puml files (default: repository root)")
+    parser.add_argument('--jar', default=PLANTUML_JAR,
+                        help="path to plantuml.jar (default: $PLANTUML_JAR or ~/plantuml.jar)")
+    parser.add_argument('--jobs', '-j', type=int, default=os.cpu_count() or 1, metavar='N',
+                        help="number of PlantUML processes to run in parallel")
+    parser.add_argument('--server', nargs='?', const=PLANTUML_SERVER, default=None,
+                        metavar='URL',
+                        help="render through a PlantUML server instead of the local jar")
+    parser.add_argument('--check', action='store_true',
+                        help="only report stale images; exit 1 if any are stale")
+    parser.add_argument('--force', action='store_true',
+                        help="render every diagram, even if its fingerprint matches")
+    parser.add_argument('--seed', action='store_true',
+                        help="record fingerprints for the existing images without rendering, "
+                             "trusting that they match their sources")
+    parser.add_argument('--trace', metavar='FILE',
+                        help="print per-stage timings and write a Chrome trace-event JSON file")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    """Render stale diagrams and report the results"""
+    args = parse_args(argv)
+    tracer.enabled = bool(args.trace)
+    puml_files = find_puml_files(args.roots)
+
+    if not puml_files:
+        print("No .puml files found")
+        return 0
+
+    fingerprints = load_fingerprints()
+    renderer_id = get_renderer_id(args.jar, args.server)
+
+    if args.seed:
+        seeded = 0
+        for puml_path in puml_files:
+            if os.path.exists(image_path_for(puml_path)):
+                fingerprints["diagrams"][relative_key(puml_path)] = \
+                    compute_fingerprint(puml_path, None)
+                seeded += 1
+            else:
+                print(f"Missing: {image_path_for(puml_path)} (not seeded)")
+        save_fingerprints(fingerprints)
+        print(f"Seeded fingerprints for {seeded}/{len(puml_files)} images")
+        return 0
+
+    if args.force:
+        stale = [(puml_path, "forced") for puml_path in puml_files]
+    else:
+        stale = [(puml_path, stale_reason(puml_path, fingerprints, renderer_id))
+                 for puml_path in puml_files]
+        stale = [(puml_path, reason) for puml_path, reason in stale if reason]
+
+    if args.check:
+        for puml_path, reason in stale:
+            print(f"Stale: {image_path_for(puml_path)} ({reason})")
+        print(f"{len(puml_files) - len(stale)}/{len(puml_files)} images up to date")
+        return 1 if stale else 0
+
+    if not stale:
+        print(f"All {len(puml_files)} images up to date")
+        return 0
+
+    to_render = [puml_path for puml_path, _ in stale]
+
+    if args.server:
+        results = render_with_server(to_render, args.server, args.jobs)
+    else:
+        if renderer_id is None:
+            print(f"PlantUML jar not found: {args.jar}")
+            print("Download plantuml.jar, set PLANTUML_JAR or pass --jar, or use --server")
+            return 1
+        results = render_with_jar(to_render, args.jar, args.jobs)
+
+    failures = 0
+    for puml_path, error in results:
+        if error:
+            failures += 1
+            print(f"Error processing {puml_path}: {error}")
+        else:
+            fingerprints["diagrams"][relative_key(puml_path)] = \
+                compute_fingerprint(puml_path, renderer_id)
+            print(f"Generated: {image_path_for(puml_path)}")
+
+    save_fingerprints(fingerprints)
+    print(f"Rendered {len(results) - failures}, "
+          f"skipped {len(puml_files) - len(to_render)} up to date")
+
+    if args.trace:
+        tracer.report(args.trace)
+
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
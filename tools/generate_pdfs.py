@@ -4,32 +4,169 @@ PDF Generator for PlayerMMO Design Patterns and Modelling Summaries
 Converts all markdown documentation to professional PDF format
 """
 
+import io
 import os
+import re
 import sys
+import time
+import json
+import hashlib
+import struct
+import select
+import argparse
+import itertools
+import contextlib
 import subprocess
 from pathlib import Path
 from datetime import datetime
+from html import escape
 
-def check_dependencies():
-    """Check if required dependencies are installed"""
-    required_packages = ['markdown', 'weasyprint', 'pygments']
-    missing_packages = []
+from build_trace import tracer
+from highlight_cache import install_highlight_cache
+
+# Markdown extensions used for every document (part of the build fingerprint)
+MARKDOWN_EXTENSIONS = [
+    'codehilite',
+    'tables',
+    'toc',
+    'fenced_code',
+    'attr_list',
+    'def_list',
+    'footnotes',
+    'md_in_html'
+]
+
+# Packages whose versions influence the generated PDFs
+TOOL_PACKAGES = ['markdown', 'weasyprint', 'pygments']
+
+# Installed package versions, cached per interpreter so startup skips the lookups
+DEPENDENCY_CACHE = Path(os.environ.get('XDG_CACHE_HOME', Path.home() / '.cache')) \
+    / 'playermmo-docs' / 'dependencies.json'
+
+# Build manifest stored next to the generated PDFs
+MANIFEST_NAME = ".build_manifest.json"
+MANIFEST_VERSION = 2
+
+# Extra directories watched by --watch besides the section sources
+WATCH_DIRS = ["PlayerMMO/Summaries", "Modelling", "docs-source"]
+
+# Seconds to wait for more events after a change, so one save triggers one rebuild
+WATCH_DEBOUNCE = 0.1
+
+# Sections combined into the --handbook PDF, in chapter order
+HANDBOOK_SECTIONS = ["Design Patterns Summaries", "Modelling Documentation"]
+HANDBOOK_NAME = "PlayerMMO_Handbook.pdf"
+
+# Cover and contents pages, numbered i, ii, ... ahead of the chapters
+HANDBOOK_FRONT_CSS = """
+@page {
+    @top-center { content: none; border: none; }
+    @bottom-center { content: counter(page, lower-roman); }
+}
+.handbook-cover { text-align: center; padding-top: 8cm; page-break-after: always; }
+.handbook-cover h1 { border: none; font-size: 32pt; }
+.handbook-toc table, .handbook-toc td { border: none; }
+.handbook-toc td.page { text-align: right; width: 2cm; }
+.handbook-toc tr.section td { font-weight: bold; color: #2c3e50; padding-top: 14pt; }
+"""
+
+# With --chunked, documents at least this large (markdown bytes) are laid out
+# in parallel chunks
+CHUNK_MIN_SIZE = 32 * 1024
+
+# Chunk boundaries: the start of a line opening an <h1> or <h2>
+HEADING_SPLIT_PATTERNS = {
+    level: re.compile(rf'^(?=<h{level}[\s>])', re.MULTILINE) for level in (1, 2)
+}
+
+# Page numbers for a chunk: it starts at first_page of a total_pages document
+CHUNK_PAGE_CSS = """
+@page :first {{ counter-reset: page {first_page}; }}
+@page {{ @bottom-center {{ content: "Page " counter(page) " of {total_pages}"; }} }}
+"""
+
+# Rough page size of rendered HTML, for first-time page number guesses
+CHUNK_CHARS_PER_PAGE = 4000
+
+# Images embedded with ![alt](src) or <img src="...">
+IMAGE_PATTERN = re.compile(r'!\[[^\]]*\]\(\s*<?([^)\s>]+)|<img\b[^>]*\bsrc=["\']([^"\']+)["\']')
+
+def get_interpreter_key():
+    """Identify this interpreter and the state of its package directories
     
-    for package in required_packages:
+    Installing, upgrading or removing a package changes the modification
+    time of the directory it lives in, which invalidates the cache.
+    """
+    directories = {}
+    for entry in sys.path:
+        # Only package directories: the script and working directories
+        # change on every build
+        if os.path.basename(entry) not in ('site-packages', 'dist-packages'):
+            continue
         try:
-            __import__(package.replace('-', '_'))
-        except ImportError:
-            missing_packages.append(package)
+            directories[entry] = os.stat(entry).st_mtime_ns
+        except OSError:
+            continue
+    # The search path without sys.path[0], the script's own directory
+    return hashlib.sha256(json.dumps(
+        [sys.executable, sys.version, sys.path[1:], directories],
+        sort_keys=True).encode('utf-8')).hexdigest()
+
+def probe_packages(packages, cache_path=DEPENDENCY_CACHE):
+    """Return {package: installed version or None} without importing anything
+    
+    Uses module spec and distribution metadata lookups, and caches the
+    answer on disk for this interpreter.
+    """
+    key = get_interpreter_key()
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+        if cache.get("key") != key:
+            cache = {"key": key, "packages": {}}
+    except (OSError, ValueError):
+        cache = {"key": key, "packages": {}}
+    
+    unknown = [package for package in packages if package not in cache["packages"]]
+    if unknown:
+        import importlib.util
+        from importlib import metadata
+    for package in unknown:
+        version = None
+        if importlib.util.find_spec(package.replace('-', '_')) is not None:
+            try:
+                version = metadata.version(package)
+            except metadata.PackageNotFoundError:
+                # Importable without distribution metadata (e.g. a source checkout)
+                version = "unknown"
+        cache["packages"][package] = version
+    
+    if unknown:
+        try:
+            cache_path = Path(cache_path)
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            temp_path = cache_path.with_suffix('.tmp')
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(cache, f, indent=2, sort_keys=True)
+            os.replace(temp_path, cache_path)
+        except OSError:
+            pass
+    
+    return {package: cache["packages"][package] for package in packages}
+
+def check_dependencies():
+    """Check if required dependencies are installed"""
+    versions = probe_packages(TOOL_PACKAGES)
+    missing_packages = [package for package, version in versions.items() if version is None]
     
     if missing_packages:
         print("Missing required packages. Installing...")
-        for package in missing_packages:
-            subprocess.run([sys.executable, '-m', 'pip', 'install', package], check=True)
+        subprocess.run([sys.executable, '-m', 'pip', 'install', *missing_packages], check=True)
         print("Dependencies installed successfully!")
 
-def setup_css_styles():
-    """Create CSS styles for PDF generation"""
-    css_content = """
+def get_css_styles():
+    """Return the CSS styles used for PDF generation"""
+    return """
 /* Professional PDF Styling for PlayerMMO Documentation */
 
 @page {
@@ -277,100 +414,421 @@ section {
     margin: 12pt 0;
 }
 """
+
+def hash_file(file_path):
+    """Return the SHA-256 hex digest of a file's contents"""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(65536), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def get_tool_versions():
+    """Return the installed versions of the packages used for conversion"""
+    return probe_packages(TOOL_PACKAGES)
+
+def compute_build_inputs(css_content):
+    """Digest everything besides the source file that shapes a PDF"""
+    inputs = {
+        "css": hashlib.sha256(css_content.encode('utf-8')).hexdigest(),
+        "extensions": MARKDOWN_EXTENSIONS,
+        "tools": get_tool_versions(),
+        # The HTML template lives in this script
+        "generator": hash_file(__file__)
+    }
+    encoded = json.dumps(inputs, sort_keys=True).encode('utf-8')
+    return hashlib.sha256(encoded).hexdigest()
+
+def find_embedded_images(md_file_path):
+    """Return the local image files a markdown document embeds, resolved
+    against the document's directory (the files may not exist)"""
+    md_path = Path(md_file_path)
+    with open(md_path, 'r', encoding='utf-8') as f:
+        md_content = f.read()
     
-    css_path = Path("pdf_styles.css")
-    with open(css_path, 'w', encoding='utf-8') as f:
-        f.write(css_content)
-    
-    return css_path
+    images = set()
+    for match in IMAGE_PATTERN.finditer(md_content):
+        src = match.group(1) or match.group(2)
+        if '://' in src or src.startswith(('data:', '#')):
+            continue
+        images.add(Path(os.path.normpath(md_path.parent / src.split('#')[0])))
+    return sorted(images)
+
+def compute_document_fingerprint(md_file_path, build_inputs):
+    """Fingerprint a document from its source, its embedded images and the
+    shared build inputs"""
+    digest = hashlib.sha256()
+    digest.update(build_inputs.encode('utf-8'))
+    digest.update(hash_file(md_file_path).encode('utf-8'))
+    for image_path in find_embedded_images(md_file_path):
+        image_hash = hash_file(image_path) if image_path.is_file() else 'missing'
+        digest.update(f"{image_path.as_posix()}:{image_hash}".encode('utf-8'))
+    return digest.hexdigest()
 
-def convert_markdown_to_html(md_file_path, output_dir):
-    """Convert markdown file to HTML with proper formatting"""
+def load_build_manifest(manifest_path):
+    """Load the build manifest, starting fresh if it is missing or unreadable"""
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        if manifest.get("version") == MANIFEST_VERSION:
+            return manifest
+    except (OSError, ValueError):
+        pass
+    return {"version": MANIFEST_VERSION, "documents": {}}
+
+def save_build_manifest(manifest_path, manifest):
+    """Write the build manifest atomically"""
+    manifest_path = Path(manifest_path)
+    manifest_path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = manifest_path.with_suffix('.tmp')
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(temp_path, manifest_path)
+
+# Markdown engine shared by every document converted in this process
+_markdown_engine = None
+
+def get_markdown_engine():
+    """Return this process's markdown engine, creating it on first use
+    
+    Building a Markdown instance registers every extension's processors and
+    compiles their patterns, so it is done once and reset between documents.
+    """
+    global _markdown_engine
     import markdown
-    from markdown.extensions import codehilite, tables, toc
     
-    # Read markdown content
-    with open(md_file_path, 'r', encoding='utf-8') as f:
-        md_content = f.read()
+    if _markdown_engine is None:
+        # Code blocks that were highlighted before come from the shared cache
+        install_highlight_cache()
+        _markdown_engine = markdown.Markdown(extensions=MARKDOWN_EXTENSIONS)
+    return _markdown_engine
+
+def render_markdown(md_content):
+    """Convert markdown text to an HTML fragment"""
+    md = get_markdown_engine()
     
-    # Configure markdown processor
-    md = markdown.Markdown(extensions=[
-        'codehilite',
-        'tables',
-        'toc',
-        'fenced_code',
-        'attr_list',
-        'def_list',
-        'footnotes',
-        'md_in_html'
-    ])
-    
-    # Convert to HTML
-    html_content = md.convert(md_content)
+    # Clear the previous document's references, footnotes and table of contents
+    md.reset()
+    return md.convert(md_content)
+
+def wrap_html_document(html_content, file_name, header=True, footer=True):
+    """Wrap an HTML fragment in the complete document template
     
-    # Create complete HTML document
-    file_name = Path(md_file_path).stem
-    html_template = f"""<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>{file_name} - PlayerMMO Documentation</title>
-    <link rel="stylesheet" href="pdf_styles.css">
-</head>
-<body>
+    header and footer can be left out for the middle chunks of a document
+    laid out in pieces (see split_html_sections).
+    """
+    header_html = f"""
     <div class="document-header">
         <h1>PlayerMMO Design Patterns</h1>
         <p><strong>Document:</strong> {file_name}</p>
         <p><strong>Generated:</strong> {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}</p>
         <hr/>
     </div>
-    
-    <div class="content">
-        {html_content}
-    </div>
-    
+    """ if header else ""
+    footer_html = """
     <div class="document-footer">
         <hr/>
         <p><em>Generated from PlayerMMO Design Patterns Documentation</em></p>
     </div>
-</body>
+""" if footer else ""
+    return f"""<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>{file_name} - PlayerMMO Documentation</title>
+</head>
+<body>{header_html}
+    <div class="content">
+        {html_content}
+    </div>
+    {footer_html}</body>
 </html>"""
+
+def convert_markdown_to_html(md_file_path):
+    """Convert a markdown file to a complete HTML document string"""
+    # Read markdown content
+    with open(md_file_path, 'r', encoding='utf-8') as f:
+        md_content = f.read()
     
-    # Save HTML file
-    html_file_path = output_dir / f"{file_name}.html"
-    with open(html_file_path, 'w', encoding='utf-8') as f:
-        f.write(html_template)
+    with tracer.span("markdown parse", md_file_path):
+        html_content = render_markdown(md_content)
     
-    return html_file_path
+    # Create complete HTML document
+    with tracer.span("html template", md_file_path):
+        return wrap_html_document(html_content, Path(md_file_path).stem)
 
-def convert_html_to_pdf(html_file_path, pdf_file_path, css_file_path):
-    """Convert HTML file to PDF using WeasyPrint"""
-    try:
-        from weasyprint import HTML, CSS
-        
-        print(f"Converting {html_file_path.name} to PDF...")
-        
-        # Configure WeasyPrint
-        html_doc = HTML(filename=str(html_file_path))
-        css_doc = CSS(filename=str(css_file_path))
+class PdfRenderer:
+    """Long-lived WeasyPrint renderer
+
+    Parses the stylesheet once and shares one FontConfiguration, so font
+    discovery and CSS parsing are paid once per process instead of once
+    per document.
+    """
+    
+    def __init__(self, css_content):
+        from weasyprint import CSS
+        try:
+            from weasyprint.text.fonts import FontConfiguration
+        except ImportError:
+            from weasyprint.fonts import FontConfiguration
         
-        # Generate PDF
-        html_doc.write_pdf(
-            str(pdf_file_path),
-            stylesheets=[css_doc],
+        self.css_content = css_content
+        self.font_config = FontConfiguration()
+        self.stylesheet = CSS(string=css_content, font_config=self.font_config)
+    
+    def render(self, html_doc, stylesheets=()):
+        """Lay out a WeasyPrint HTML document into pages"""
+        return html_doc.render(
+            stylesheets=[self.stylesheet, *stylesheets],
+            font_config=self.font_config,
             optimize_images=True
         )
+
+# Renderer shared by every document rendered in this process
+_renderer = None
+
+def get_renderer(css_content):
+    """Return this process's renderer, creating it on first use"""
+    global _renderer
+    
+    if _renderer is None or _renderer.css_content != css_content:
+        _renderer = PdfRenderer(css_content)
+    return _renderer
+
+def convert_html_to_pdf(html_content, pdf_file_path, css_content, base_url=None,
+                        document=None):
+    """Convert an HTML string to PDF using WeasyPrint
+    
+    Relative links and images are resolved against base_url, normally the
+    markdown source file, so nothing has to be written next to the PDF.
+    Trace spans are attributed to document (the PDF path by default).
+    """
+    name = Path(pdf_file_path).stem
+    document = document or pdf_file_path
+    try:
+        from weasyprint import HTML
+        
+        print(f"Converting {name} to PDF...")
+        
+        # Generate PDF through the shared renderer
+        renderer = get_renderer(css_content)
+        with tracer.span("weasyprint layout", document):
+            pages = renderer.render(HTML(string=html_content, base_url=base_url))
+        with tracer.span("pdf write", document):
+            pages.write_pdf(str(pdf_file_path), optimize_images=True)
         
         print(f"✓ Generated: {pdf_file_path}")
         return True
         
     except Exception as e:
-        print(f"✗ Error converting {html_file_path.name}: {str(e)}")
+        print(f"✗ Error converting {name}: {str(e)}")
         return False
 
-def generate_pdfs_for_directory(source_dir, output_dir, css_file_path):
-    """Generate PDFs for all markdown files in a directory"""
+def render_document(md_file, output_path, css_content, keep_html=False):
+    """Convert one markdown file to PDF, capturing its progress output
+
+    Runs unchanged in a worker process; the captured log and trace spans
+    are returned so the caller can print and merge them in a deterministic
+    order. HTML and CSS stay in memory unless keep_html asks for the HTML
+    to be saved next to the PDF.
+    """
+    log = io.StringIO()
+    success = False
+    
+    with contextlib.redirect_stdout(log), tracer.collect() as spans:
+        try:
+            output_path.mkdir(parents=True, exist_ok=True)
+            
+            # Convert markdown to HTML
+            html_content = convert_markdown_to_html(md_file)
+            if keep_html:
+                html_file = output_path / f"{md_file.stem}.html"
+                html_file.write_text(html_content, encoding='utf-8')
+            
+            # Convert HTML to PDF
+            pdf_file = output_path / f"{md_file.stem}.pdf"
+            success = convert_html_to_pdf(html_content, pdf_file, css_content,
+                                          base_url=str(Path(md_file).resolve()),
+                                          document=md_file)
+            
+        except Exception as e:
+            print(f"✗ Error processing {md_file.name}: {str(e)}")
+    
+    return success, log.getvalue(), spans
+
+def split_html_sections(html_content):
+    """Split an HTML fragment before each top-level heading
+    
+    Top-level means <h1>, or <h2> when the document has fewer than two
+    <h1> headings. Content before the first heading stays with it.
+    """
+    for pattern in HEADING_SPLIT_PATTERNS.values():
+        if len(pattern.findall(html_content)) < 2:
+            continue
+        parts = pattern.split(html_content)
+        return [parts[0] + parts[1], *parts[2:]]
+    return [html_content]
+
+def group_sections(parts, count):
+    """Join consecutive sections into at most count chunks of similar size"""
+    total = sum(len(part) for part in parts)
+    chunks = []
+    current = []
+    size = 0
+    for part in parts:
+        current.append(part)
+        size += len(part)
+        if len(chunks) < count - 1 and size >= total * (len(chunks) + 1) / count:
+            chunks.append(''.join(current))
+            current = []
+    if current:
+        chunks.append(''.join(current))
+    return chunks
+
+def render_chunk(html_content, base_url, css_content, first_page, total_pages, document):
+    """Lay out one chunk of a split document in a worker process
+    
+    The chunk's footers count from first_page out of total_pages. Returns
+    (PDF bytes, page count, trace spans).
+    """
+    from weasyprint import CSS, HTML
+    
+    with tracer.collect() as spans:
+        renderer = get_renderer(css_content)
+        page_css = CSS(string=CHUNK_PAGE_CSS.format(first_page=first_page, total_pages=total_pages),
+                       font_config=renderer.font_config)
+        with tracer.span("weasyprint layout", document):
+            pages = renderer.render(HTML(string=html_content, base_url=base_url),
+                                    stylesheets=[page_css])
+        with tracer.span("pdf write", document):
+            data = pages.write_pdf(optimize_images=True)
+    return data, len(pages.pages), spans
+
+def page_number_guesses(page_counts):
+    """Return (first page of each chunk, total pages) for chunk page counts"""
+    starts = list(itertools.accumulate([1] + page_counts[:-1]))
+    return starts, sum(page_counts)
+
+def split_document(md_file, count):
+    """Render a document as up to count HTML documents split at its top-level headings"""
+    with open(md_file, 'r', encoding='utf-8') as f:
+        md_content = f.read()
+    with tracer.span("markdown parse", md_file):
+        fragments = group_sections(split_html_sections(render_markdown(md_content)), count)
+    
+    name = Path(md_file).stem
+    with tracer.span("html template", md_file):
+        return [wrap_html_document(fragment, name, header=index == 0,
+                                   footer=index == len(fragments) - 1)
+                for index, fragment in enumerate(fragments)]
+
+def guess_page_counts(html_chunks, recorded):
+    """Return the recorded page counts of chunks, or estimates from their size"""
+    if recorded and len(recorded) == len(html_chunks):
+        return recorded
+    return [max(1, round(len(chunk) / CHUNK_CHARS_PER_PAGE)) for chunk in html_chunks]
+
+def submit_chunks(md_file, css_content, executor, count, chunk_pages):
+    """Split a document at its top-level headings and queue its chunks
+    
+    Page numbers are guessed from the page counts recorded by the last
+    build (chunk_pages), or from the chunks' size the first time. Returns
+    None when the document does not split into several chunks.
+    """
+    html_chunks = split_document(md_file, count)
+    if len(html_chunks) < 2:
+        return None
+    
+    starts, total = page_number_guesses(
+        guess_page_counts(html_chunks, chunk_pages.get(Path(md_file).as_posix())))
+    
+    base_url = str(Path(md_file).resolve())
+    return {
+        "html": html_chunks,
+        "base_url": base_url,
+        "guesses": [(start, total) for start in starts],
+        "futures": [executor.submit(render_chunk, html, base_url, css_content,
+                                    start, total, str(md_file))
+                    for html, start in zip(html_chunks, starts)]
+    }
+
+def stitch_pdfs(chunk_pdfs, pdf_file_path, front_pages=0):
+    """Concatenate chunk PDFs (bytes or PdfReaders) into one file, keeping their outlines
+    
+    With front_pages, the first pages are labelled i, ii, ... and the rest
+    are numbered from 1.
+    """
+    from pypdf import PdfReader, PdfWriter
+    
+    writer = PdfWriter()
+    for index, data in enumerate(chunk_pdfs):
+        reader = data if isinstance(data, PdfReader) else PdfReader(io.BytesIO(data))
+        if index == 0 and reader.metadata:
+            writer.add_metadata(reader.metadata)
+        writer.append(reader, import_outline=True)
+    if front_pages:
+        writer.set_page_label(0, front_pages - 1, style='/r', start=1)
+        writer.set_page_label(front_pages, len(writer.pages) - 1, style='/D', start=1)
+    with open(pdf_file_path, 'wb') as f:
+        writer.write(f)
+
+def collect_chunks(job, css_content, executor, chunk_pages):
+    """Wait for a split document's chunks and stitch them into its PDF
+    
+    Chunks laid out with wrong page numbers (because pages were added or
+    removed since the guess) are laid out again with the real ones.
+    Returns (success, log, spans) like render_document().
+    """
+    md_file = job["md_file"]
+    pdf_file = job["pdf_file"]
+    chunked = job["chunked"]
+    log = io.StringIO()
+    all_spans = []
+    success = False
+    
+    with contextlib.redirect_stdout(log):
+        try:
+            print(f"Converting {pdf_file.stem} to PDF in {len(chunked['html'])} chunks...")
+            results = [future.result() for future in chunked["futures"]]
+            starts, total = page_number_guesses([count for _, count, _ in results])
+            
+            wrong = [index for index, guess in enumerate(chunked["guesses"])
+                     if guess != (starts[index], total)]
+            if wrong:
+                print(f"  Page numbers moved, laying out {len(wrong)} chunk(s) again")
+                futures = {index: executor.submit(render_chunk, chunked["html"][index],
+                                                  chunked["base_url"], css_content,
+                                                  starts[index], total, str(md_file))
+                           for index in wrong}
+                for index, future in futures.items():
+                    all_spans.extend(results[index][2])
+                    results[index] = future.result()
+            for _, _, spans in results:
+                all_spans.extend(spans)
+            
+            with tracer.span("pdf stitch", md_file):
+                stitch_pdfs([data for data, _, _ in results], pdf_file)
+            chunk_pages[Path(md_file).as_posix()] = [count for _, count, _ in results]
+            
+            print(f"✓ Generated: {pdf_file}")
+            success = True
+        except Exception as e:
+            print(f"✗ Error converting {pdf_file.stem}: {str(e)}")
+    
+    return success, log.getvalue(), all_spans
+
+def submit_directory(source_dir, output_dir, css_content,
+                     manifest=None, build_inputs=None, executor=None,
+                     keep_html=False, chunks=0):
+    """Plan the conversions for a directory and queue them on the executor
+    
+    When a manifest is given, documents whose fingerprint matches the
+    recorded one (and whose PDF still exists) are marked up to date.
+    Without an executor the conversions run later, in collect_directory().
+    With chunks > 1, large documents are split into up to that many chunks
+    laid out in parallel.
+    """
     source_path = Path(source_dir)
     output_path = Path(output_dir)
     
@@ -378,55 +836,386 @@ def generate_pdfs_for_directory(source_dir, output_dir, css_file_path):
     output_path.mkdir(parents=True, exist_ok=True)
     
     # Find all markdown files
-    md_files = list(source_path.glob("*.md"))
+    md_files = sorted(source_path.glob("*.md"))
     
-    if not md_files:
-        print(f"No markdown files found in {source_dir}")
+    documents = manifest["documents"] if manifest is not None else None
+    jobs = []
+    
+    for md_file in md_files:
+        pdf_file = output_path / f"{md_file.stem}.pdf"
+        job = {
+            "md_file": md_file,
+            "pdf_file": pdf_file,
+            "output_path": output_path,
+            "fingerprint": None,
+            "up_to_date": False,
+            "future": None,
+            "chunked": None
+        }
+        
+        # Skip documents whose inputs have not changed
+        if documents is not None:
+            try:
+                job["fingerprint"] = compute_document_fingerprint(md_file, build_inputs)
+            except OSError:
+                pass
+            manifest_key = pdf_file.as_posix()
+            if (job["fingerprint"] and pdf_file.exists()
+                    and documents.get(manifest_key) == job["fingerprint"]):
+                job["up_to_date"] = True
+            else:
+                documents.pop(manifest_key, None)
+        
+        if executor is not None and not job["up_to_date"]:
+            if chunks > 1 and not keep_html and md_file.stat().st_size >= CHUNK_MIN_SIZE:
+                chunk_pages = manifest.setdefault("chunks", {}) if manifest is not None else {}
+                job["chunked"] = submit_chunks(md_file, css_content, executor, chunks, chunk_pages)
+            if job["chunked"] is None:
+                job["future"] = executor.submit(
+                    render_document, md_file, output_path, css_content, keep_html)
+        
+        jobs.append(job)
+    
+    return {
+        "source_dir": source_dir,
+        "css_content": css_content,
+        "keep_html": keep_html,
+        "executor": executor,
+        "jobs": jobs
+    }
+
+def collect_directory(batch, manifest=None, report_up_to_date=True):
+    """Wait for a directory's conversions and report them in file order"""
+    if not batch["jobs"]:
+        print(f"No markdown files found in {batch['source_dir']}")
         return []
     
+    documents = manifest["documents"] if manifest is not None else None
     generated_pdfs = []
     
-    for md_file in md_files:
-        try:
-            # Convert markdown to HTML
-            html_file = convert_markdown_to_html(md_file, output_path)
-            
-            # Convert HTML to PDF
-            pdf_file = output_path / f"{md_file.stem}.pdf"
-            
-            if convert_html_to_pdf(html_file, pdf_file, css_file_path):
-                generated_pdfs.append(pdf_file)
-            
-            # Clean up HTML file
-            html_file.unlink()
-            
-        except Exception as e:
-            print(f"✗ Error processing {md_file.name}: {str(e)}")
+    for job in batch["jobs"]:
+        pdf_file = job["pdf_file"]
+        
+        if job["up_to_date"]:
+            if report_up_to_date:
+                print(f"↷ Up to date: {pdf_file}")
+            generated_pdfs.append(pdf_file)
+            continue
+        
+        if job["chunked"] is not None:
+            chunk_pages = manifest.setdefault("chunks", {}) if manifest is not None else {}
+            success, log, spans = collect_chunks(job, batch["css_content"], batch["executor"],
+                                                 chunk_pages)
+        elif job["future"] is not None:
+            try:
+                success, log, spans = job["future"].result()
+            except Exception as e:
+                log = f"✗ Error processing {job['md_file'].name}: {str(e)}\n"
+                success, spans = False, []
+        else:
+            success, log, spans = render_document(
+                job["md_file"], job["output_path"], batch["css_content"],
+                batch["keep_html"])
+        
+        print(log, end='')
+        tracer.merge(spans)
+        
+        if success:
+            generated_pdfs.append(pdf_file)
+            if documents is not None and job["fingerprint"]:
+                documents[pdf_file.as_posix()] = job["fingerprint"]
     
     return generated_pdfs
 
-def main():
-    """Main function to generate all PDFs"""
-    print("🔄 PlayerMMO Documentation PDF Generator")
-    print("=" * 50)
+def generate_pdfs_for_directory(source_dir, output_dir, css_content,
+                                manifest=None, build_inputs=None, executor=None,
+                                keep_html=False):
+    """Generate PDFs for all markdown files in a directory"""
+    batch = submit_directory(source_dir, output_dir, css_content,
+                             manifest=manifest, build_inputs=build_inputs,
+                             executor=executor, keep_html=keep_html)
+    return collect_directory(batch, manifest=manifest)
+
+def get_document_title(md_file_path):
+    """Return a document's first top-level heading, or a title made from its name"""
+    with open(md_file_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.startswith('# '):
+                return line[2:].strip()
+    return Path(md_file_path).stem.replace('_', ' ')
+
+def handbook_front_matter_html(entries):
+    """Build the cover and contents page for (section, title, first page) entries"""
+    rows = []
+    current_section = None
+    for section_name, title, first_page in entries:
+        if section_name != current_section:
+            rows.append(f'<tr class="section"><td colspan="2">{escape(section_name)}</td></tr>')
+            current_section = section_name
+        rows.append(f'<tr><td>{escape(title)}</td><td class="page">{first_page}</td></tr>')
     
-    # Check and install dependencies
-    print("📦 Checking dependencies...")
-    check_dependencies()
+    return f"""<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <title>PlayerMMO Design Patterns Handbook</title>
+</head>
+<body>
+    <div class="handbook-cover">
+        <h1>PlayerMMO Design Patterns Handbook</h1>
+        <p>{len(entries)} chapters</p>
+        <p><strong>Generated:</strong> {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}</p>
+    </div>
+    <div class="handbook-toc">
+        <h2>Contents</h2>
+        <table>
+            {"".join(rows)}
+        </table>
+    </div>
+</body>
+</html>"""
+
+def build_handbook(sections, batches, generated_pdfs, css_content, manifest, build_inputs,
+                   handbook_path):
+    """Combine the chapters' PDFs behind a generated cover and contents page
     
-    # Setup CSS styles
-    print("🎨 Setting up PDF styles...")
-    css_file_path = setup_css_styles()
+    The chapters are the PDFs the section pass has just written or found up
+    to date, so no chapter is laid out again; only the front matter is.
+    Page labels number the chapters continuously from 1 after the front
+    matter, matching the contents page.
+    Returns True when the handbook is up to date or was written.
+    """
+    from pypdf import PdfReader
+    from weasyprint import CSS, HTML
     
-    # Define source and output directories
-    base_dir = Path(".")
-    pdf_output_dir = base_dir / "PDFs"
+    chapters = [(section["name"], job) for section, batch in zip(sections, batches)
+                if batch is not None and section["name"] in HANDBOOK_SECTIONS
+                for job in batch["jobs"]]
+    if not chapters:
+        print("No chapters for the handbook")
+        return False
     
-    # Create main PDF output directory
-    pdf_output_dir.mkdir(exist_ok=True)
+    digest = hashlib.sha256(build_inputs.encode('utf-8'))
+    for _, job in chapters:
+        digest.update(f"{job['pdf_file'].as_posix()}:{job['fingerprint']}".encode('utf-8'))
+    fingerprint = digest.hexdigest()
     
-    # Generate PDFs for different sections
-    sections = [
+    documents = manifest["documents"]
+    handbook_key = handbook_path.as_posix()
+    if handbook_path.exists() and documents.get(handbook_key) == fingerprint:
+        print(f"↷ Up to date: {handbook_path}")
+        return True
+    documents.pop(handbook_key, None)
+    
+    missing = [job["pdf_file"].name for _, job in chapters if job["pdf_file"] not in generated_pdfs]
+    if missing:
+        print(f"✗ Not assembling {handbook_path.name}, chapters failed: {', '.join(missing)}")
+        return False
+    
+    print(f"Assembling {handbook_path.name} from {len(chapters)} chapters...")
+    try:
+        readers = [PdfReader(job["pdf_file"]) for _, job in chapters]
+        starts, total = page_number_guesses([len(reader.pages) for reader in readers])
+        entries = [(section_name, get_document_title(job["md_file"]), start)
+                   for (section_name, job), start in zip(chapters, starts)]
+        
+        # Chapters are numbered from 1 after the front matter, so the
+        # contents page does not depend on its own length
+        renderer = get_renderer(css_content)
+        with tracer.span("weasyprint layout", handbook_path):
+            front_matter = renderer.render(
+                HTML(string=handbook_front_matter_html(entries)),
+                stylesheets=[CSS(string=HANDBOOK_FRONT_CSS, font_config=renderer.font_config)])
+        with tracer.span("pdf write", handbook_path):
+            front_pdf = front_matter.write_pdf(optimize_images=True)
+        with tracer.span("pdf stitch", handbook_path):
+            stitch_pdfs([front_pdf, *readers], handbook_path,
+                        front_pages=len(front_matter.pages))
+    except Exception as e:
+        print(f"✗ Error assembling {handbook_path.name}: {str(e)}")
+        return False
+    
+    # A handbook with chapters that could not be fingerprinted is rebuilt next time
+    if all(job["fingerprint"] for _, job in chapters):
+        documents[handbook_key] = fingerprint
+    print(f"✓ Generated: {handbook_path} ({len(front_matter.pages) + total} pages)")
+    return True
+
+class DirectoryWatcher:
+    """Reports changed files below a set of directories
+
+    Uses inotify on Linux and falls back to polling modification times on
+    other platforms. Directories are given as (path, recursive) pairs.
+    """
+    
+    IN_CLOSE_WRITE = 0x008
+    IN_MOVED_FROM = 0x040
+    IN_MOVED_TO = 0x080
+    IN_CREATE = 0x100
+    IN_DELETE = 0x200
+    IN_ISDIR = 0x40000000
+    EVENT_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+    EVENT_HEADER = struct.Struct('iIII')
+    
+    def __init__(self, directories, poll_interval=0.5):
+        self.directories = [(Path(path), recursive) for path, recursive in directories
+                            if Path(path).is_dir()]
+        self.poll_interval = poll_interval
+        self.watches = {}
+        self.fd = None
+        self.libc = None
+        
+        if sys.platform.startswith('linux'):
+            try:
+                self._init_inotify()
+            except OSError:
+                self.fd = None
+        if self.fd is None:
+            self.snapshot = self._scan()
+    
+    def _init_inotify(self):
+        import ctypes
+        import ctypes.util
+        
+        self.libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        fd = self.libc.inotify_init1(os.O_CLOEXEC)
+        if fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.fd = fd
+        for path, recursive in self.directories:
+            self._add_watch(path, recursive)
+    
+    def _add_watch(self, path, recursive):
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(path), self.EVENT_MASK)
+        if wd >= 0:
+            self.watches[wd] = (path, recursive)
+        if recursive:
+            for child in path.iterdir():
+                if child.is_dir() and not child.name.startswith('.'):
+                    self._add_watch(child, True)
+    
+    def _read_events(self, timeout):
+        """Read one batch of inotify events, or nothing after timeout seconds"""
+        changed = set()
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return changed
+        
+        data = os.read(self.fd, 64 * 1024)
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = self.EVENT_HEADER.unpack_from(data, offset)
+            offset += self.EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b'\0')
+            offset += length
+            
+            if wd not in self.watches or not name:
+                continue
+            directory, recursive = self.watches[wd]
+            path = directory / os.fsdecode(name)
+            if mask & self.IN_ISDIR:
+                if recursive and mask & (self.IN_CREATE | self.IN_MOVED_TO):
+                    self._add_watch(path, True)
+                continue
+            changed.add(path)
+        return changed
+    
+    def _scan(self):
+        snapshot = {}
+        for path, recursive in self.directories:
+            files = path.rglob('*') if recursive else path.iterdir()
+            for file_path in files:
+                try:
+                    if file_path.is_file():
+                        snapshot[file_path] = file_path.stat().st_mtime_ns
+                except OSError:
+                    continue
+        return snapshot
+    
+    def changes(self):
+        """Yield sets of changed paths, one set per burst of changes"""
+        while True:
+            if self.fd is not None:
+                changed = self._read_events(None)
+                # Collect the rest of the burst (editors write several events)
+                while True:
+                    more = self._read_events(WATCH_DEBOUNCE)
+                    if not more:
+                        break
+                    changed |= more
+            else:
+                time.sleep(self.poll_interval)
+                snapshot = self._scan()
+                changed = {path for path in snapshot.keys() | self.snapshot.keys()
+                           if snapshot.get(path) != self.snapshot.get(path)}
+                self.snapshot = snapshot
+            
+            if changed:
+                yield changed
+    
+    def close(self):
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+def watch_sections(sections, css_content, manifest, manifest_path, build_inputs,
+                   keep_html=False):
+    """Rebuild affected PDFs whenever a watched file changes
+
+    The markdown and WeasyPrint pipeline stays imported and the renderer
+    stays warm, so a single edit costs a single document render. Which
+    documents are affected is decided by the build manifest, so edits to
+    embedded images are picked up as well.
+    """
+    directories = [(path, True) for path in WATCH_DIRS]
+    image_dirs = set()
+    for section in sections:
+        source_path = Path(section["source"])
+        # The repository root is only watched for its own markdown files
+        directories.append((source_path, source_path != Path(".")))
+        for md_file in source_path.glob("*.md"):
+            image_dirs.update(image.parent for image in find_embedded_images(md_file))
+    directories.extend((path, False) for path in sorted(image_dirs))
+    
+    # Warm the pipeline before the first edit arrives; failures are
+    # reported per document when it renders
+    try:
+        import markdown
+        get_renderer(css_content)
+    except Exception:
+        pass
+    
+    watcher = DirectoryWatcher(directories)
+    mode = "inotify" if watcher.fd is not None else "polling"
+    print(f"\n👀 Watching for changes ({mode}), press Ctrl+C to stop...")
+    
+    try:
+        for changed in watcher.changes():
+            names = ", ".join(sorted(str(path) for path in changed)[:5])
+            print(f"\n🔁 Changed: {names}")
+            
+            rebuilt = []
+            for section in sections:
+                if not Path(section["source"]).exists():
+                    continue
+                batch = submit_directory(section["source"], section["output"], css_content,
+                                         manifest=manifest, build_inputs=build_inputs,
+                                         keep_html=keep_html)
+                before = {job["pdf_file"] for job in batch["jobs"] if not job["up_to_date"]}
+                collect_directory(batch, manifest=manifest, report_up_to_date=False)
+                rebuilt.extend(before)
+            
+            save_build_manifest(manifest_path, manifest)
+            if not rebuilt:
+                print("↷ No PDFs affected")
+    except KeyboardInterrupt:
+        print("\n👋 Stopped watching")
+    finally:
+        watcher.close()
+
+def get_sections(pdf_output_dir):
+    """Return the documentation sections and where their PDFs go"""
+    return [
         {
             "name": "Design Patterns Summaries",
             "source": "PlayerMMO/Summaries",
@@ -443,26 +1232,135 @@ def main():
             "output": pdf_output_dir / "Main"
         }
     ]
+
+def parse_args(argv=None):
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(
+        description="Generate PDFs from the PlayerMMO markdown documentation")
+    parser.add_argument('--force', action='store_true',
+                        help="ignore the build manifest and rebuild every PDF")
+    parser.add_argument('--jobs', '-j', type=int, default=1, metavar='N',
+                        help="render N documents in parallel (0 = one per CPU)")
+    parser.add_argument('--keep-html', action='store_true',
+                        help="also save each document's intermediate HTML next to its PDF")
+    parser.add_argument('--watch', action='store_true',
+                        help="after building, keep watching the sources and rebuild what changes")
+    parser.add_argument('--handbook', action='store_true',
+                        help=f"also combine the {' and '.join(HANDBOOK_SECTIONS)} documents into "
+                             f"{HANDBOOK_NAME} with continuous page numbers (needs pypdf)")
+    parser.add_argument('--chunked', action='store_true',
+                        help=f"split documents of {CHUNK_MIN_SIZE // 1024} KB or more at their "
+                             f"top-level headings and lay the chunks out in parallel "
+                             f"(needs --jobs > 1 and pypdf)")
+    parser.add_argument('--trace', metavar='FILE',
+                        help="print per-stage timings and write a Chrome trace-event JSON file")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    """Main function to generate all PDFs"""
+    args = parse_args(argv)
+    tracer.enabled = bool(args.trace)
+    
+    print("🔄 PlayerMMO Documentation PDF Generator")
+    print("=" * 50)
+    
+    # Check and install dependencies
+    print("📦 Checking dependencies...")
+    with tracer.span("dependency check"):
+        check_dependencies()
+    
+    # Setup CSS styles
+    print("🎨 Setting up PDF styles...")
+    css_content = get_css_styles()
+    
+    # Define source and output directories
+    base_dir = Path(".")
+    pdf_output_dir = base_dir / "PDFs"
+    
+    # Create main PDF output directory
+    pdf_output_dir.mkdir(exist_ok=True)
+    
+    # Load the build manifest so unchanged documents can be skipped
+    manifest_path = pdf_output_dir / MANIFEST_NAME
+    if args.force:
+        manifest = load_build_manifest(os.devnull)
+    else:
+        manifest = load_build_manifest(manifest_path)
+    build_inputs = compute_build_inputs(css_content)
+    
+    # Generate PDFs for different sections
+    sections = get_sections(pdf_output_dir)
     
     all_generated_pdfs = []
+    jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+    executor = None
+    if jobs > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        
+        # Each worker builds its renderer on its first document, so a WeasyPrint
+        # failure is reported per document instead of breaking the pool
+        executor = ProcessPoolExecutor(max_workers=jobs)
+    
+    # Chunks and handbook chapters are stitched together with pypdf
+    has_pypdf = (args.chunked or args.handbook) and probe_packages(['pypdf'])['pypdf'] is not None
+    if args.handbook and not has_pypdf:
+        print(f"⚠️  --handbook needs pypdf (pip install pypdf), not generating {HANDBOOK_NAME}")
+    
+    # Large documents are split across the workers when they can be stitched back
+    chunks = 0
+    if args.chunked:
+        if executor is None:
+            print("⚠️  --chunked needs --jobs > 1, laying out documents whole")
+        elif not has_pypdf:
+            print("⚠️  --chunked needs pypdf (pip install pypdf), laying out documents whole")
+        else:
+            chunks = jobs
     
+    # Queue every section up front so the pool works across sections
+    batches = []
     for section in sections:
-        print(f"\n📄 Generating PDFs for {section['name']}...")
-        print("-" * 40)
-        
-        # Check if source directory exists
         if not Path(section["source"]).exists():
-            print(f"⚠️  Source directory {section['source']} not found, skipping...")
+            batches.append(None)
             continue
-        
-        generated = generate_pdfs_for_directory(
+        batches.append(submit_directory(
             section["source"],
             section["output"], 
-            css_file_path
-        )
+            css_content,
+            manifest=manifest,
+            build_inputs=build_inputs,
+            executor=executor,
+            keep_html=args.keep_html,
+            chunks=chunks
+        ))
+    
+    try:
+        for section, batch in zip(sections, batches):
+            print(f"\n📄 Generating PDFs for {section['name']}...")
+            print("-" * 40)
+            
+            # Check if source directory exists
+            if batch is None:
+                print(f"⚠️  Source directory {section['source']} not found, skipping...")
+                continue
+            
+            generated = collect_directory(batch, manifest=manifest)
+            
+            all_generated_pdfs.extend(generated)
+            print(f"✓ Generated {len(generated)} PDFs for {section['name']}")
         
-        all_generated_pdfs.extend(generated)
-        print(f"✓ Generated {len(generated)} PDFs for {section['name']}")
+        # The handbook reuses the chapters' PDFs written above
+        if args.handbook and has_pypdf:
+            print(f"\n📚 Generating handbook...")
+            print("-" * 40)
+            handbook_path = pdf_output_dir / HANDBOOK_NAME
+            if build_handbook(sections, batches, all_generated_pdfs, css_content, manifest,
+                              build_inputs, handbook_path):
+                all_generated_pdfs.append(handbook_path)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    
+    save_build_manifest(manifest_path, manifest)
     
     # Generate summary report
     print(f"\n📊 PDF Generation Summary")
@@ -476,12 +1374,15 @@ def main():
             relative_path = pdf_file.relative_to(pdf_output_dir)
             print(f"  • {relative_path}")
     
-    # Cleanup temporary files
-    if css_file_path.exists():
-        css_file_path.unlink()
-    
     print(f"\n🎉 PDF generation complete!")
     print(f"All PDFs saved to: {pdf_output_dir.absolute()}")
+    
+    if args.trace:
+        tracer.report(args.trace)
+    
+    if args.watch:
+        watch_sections(sections, css_content, manifest, manifest_path, build_inputs,
+                       keep_html=args.keep_html)
 
 if __name__ == "__main__":
     main()
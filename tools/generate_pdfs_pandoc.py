@@ -6,10 +6,32 @@ Simpler approach using pandoc for markdown to PDF conversion
 
 import os
 import sys
+import json
+import shutil
+import asyncio
+import hashlib
+import argparse
+import tempfile
 import subprocess
 from pathlib import Path
 from datetime import datetime
 
+from build_trace import tracer
+from generate_pdfs import find_embedded_images
+
+# Precompiled preamble formats, keyed on the preamble and the xelatex version
+FORMAT_CACHE_DIR = Path(os.environ.get('XDG_CACHE_HOME', Path.home() / '.cache')) \
+    / 'playermmo-docs' / 'latex-formats'
+
+# LaTeX intermediates are kept per document below each output directory
+BUILD_DIR_NAME = ".pandoc-build"
+
+# xelatex passes before giving up on the auxiliary files settling
+MAX_LATEX_RUNS = 4
+
+# Files one xelatex pass writes for the next (cross references, TOC, outline)
+AUX_EXTENSIONS = ['.aux', '.toc', '.out']
+
 def check_pandoc():
     """Check if pandoc is installed"""
     try:
@@ -23,9 +45,9 @@ def check_pandoc():
         print("   Or download from: https://pandoc.org/installing.html")
         return False
 
-def create_pandoc_template():
-    """Create a custom LaTeX template for better PDF formatting"""
-    template_content = r"""
+def get_pandoc_template():
+    """Return the custom LaTeX template for better PDF formatting"""
+    return r"""
 \documentclass[11pt,a4paper]{article}
 \usepackage[utf8]{inputenc}
 \usepackage[T1]{fontenc}
@@ -142,31 +164,109 @@ $body$
 
 \end{document}
 """
-    
-    template_path = Path("pandoc_template.latex")
+
+def create_pandoc_template(directory=".", template=None):
+    """Create a custom LaTeX template for better PDF formatting"""
+    template_path = Path(directory) / "pandoc_template.latex"
     with open(template_path, 'w', encoding='utf-8') as f:
-        f.write(template_content)
+        f.write(template if template is not None else get_pandoc_template())
     
     return template_path
 
-def convert_markdown_to_pdf_pandoc(md_file_path, output_dir, template_path):
-    """Convert markdown to PDF using pandoc"""
-    md_path = Path(md_file_path)
-    output_path = Path(output_dir)
+def split_template(template):
+    """Split the LaTeX template into its static preamble and the document body"""
+    index = template.index('\\begin{document}')
+    return template[:index], template[index:]
+
+def get_xelatex_version():
+    """Return xelatex's version line, or None when it is not installed"""
+    try:
+        result = subprocess.run(['xelatex', '--version'],
+                                capture_output=True, text=True, check=True)
+        return result.stdout.split('\n')[0]
+    except (subprocess.CalledProcessError, FileNotFoundError):
+        return None
+
+def check_xelatex():
+    """Check if xelatex, which typesets pandoc's LaTeX, is installed"""
+    version = get_xelatex_version()
+    if version is None:
+        print("❌ xelatex not found. Please install a TeX distribution:")
+        print("   Windows: choco install miktex (with Chocolatey)")
+        print("   Or TeX Live from: https://tug.org/texlive/")
+        return False
+    print("✓ xelatex found:", version)
+    return True
+
+def build_preamble_format(template, cache_dir=FORMAT_CACHE_DIR):
+    """Dump the template's preamble into a precompiled xelatex format
     
-    # Create output directory if it doesn't exist
-    output_path.mkdir(parents=True, exist_ok=True)
+    The packages in the preamble are loaded once, by mylatexformat, instead
+    of on every xelatex run. Returns the format name, or None when it cannot
+    be built. A format is reused until the preamble or xelatex changes.
+    """
+    version = get_xelatex_version()
+    if version is None:
+        return None
     
-    # Define output PDF path
-    pdf_path = output_path / f"{md_path.stem}.pdf"
+    preamble, _ = split_template(template)
+    key = hashlib.sha256(f"{version}\n{preamble}".encode('utf-8')).hexdigest()[:16]
+    name = f"preamble-{key}"
+    cache_dir = Path(cache_dir)
+    if (cache_dir / f"{name}.fmt").exists():
+        return name
+    
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    (cache_dir / f"{name}.tex").write_text(
+        preamble + "\\begin{document}\n\\end{document}\n", encoding='utf-8')
+    cmd = [
+        'xelatex', '-ini', '-interaction=nonstopmode', f'-jobname={name}',
+        '&xelatex', 'mylatexformat.ltx', f'{name}.tex'
+    ]
+    with tracer.span("preamble format"):
+        result = subprocess.run(cmd, cwd=cache_dir, capture_output=True, text=True)
+    if result.returncode != 0 or not (cache_dir / f"{name}.fmt").exists():
+        print("⚠️  Could not precompile the LaTeX preamble, using the full template")
+        return None
+    return name
+
+def get_format_environment(cache_dir=FORMAT_CACHE_DIR):
+    """Environment in which xelatex finds the cached formats"""
+    env = dict(os.environ)
+    # The trailing separator keeps TeX's default format directories
+    env['TEXFORMATS'] = f"{cache_dir}{os.pathsep}{env.get('TEXFORMATS', '')}"
+    return env
+
+def hash_file(file_path):
+    """Return the SHA-256 hex digest of a file's contents"""
+    return hashlib.sha256(Path(file_path).read_bytes()).hexdigest()
+
+def hash_embedded_images(md_path):
+    """Hash the local images a document embeds
     
-    # Prepare pandoc command
-    pandoc_cmd = [
+    The LaTeX source only names them, so a re-rendered diagram would not
+    change it.
+    """
+    return {image.as_posix(): hash_file(image) if image.is_file() else 'missing'
+            for image in find_embedded_images(md_path)}
+
+def hash_aux_files(build_dir, stem):
+    """Digest the auxiliary files one xelatex pass leaves for the next"""
+    digest = hashlib.sha256()
+    for extension in AUX_EXTENSIONS:
+        aux_path = build_dir / f"{stem}{extension}"
+        digest.update(extension.encode('utf-8'))
+        digest.update(aux_path.read_bytes() if aux_path.exists() else b'missing')
+    return digest.hexdigest()
+
+def pandoc_command(md_path, tex_path, template_path):
+    """Return the pandoc command that writes a markdown file's LaTeX source"""
+    return [
         'pandoc',
         str(md_path),
-        '-o', str(pdf_path),
+        '-s',
+        '-o', str(tex_path),
         '--template', str(template_path),
-        '--pdf-engine=xelatex',
         '--toc',
         '--toc-depth=3',
         '--number-sections',
@@ -177,18 +277,163 @@ def convert_markdown_to_pdf_pandoc(md_file_path, output_dir, template_path):
         '--variable', 'classoption=onecolumn',
         '--variable', 'linestretch=1.2'
     ]
+
+async def run_command(cmd, label, cwd=None, env=None):
+    """Run a command as an asyncio subprocess, streaming its stderr
+    
+    Each stderr line is printed as it arrives, prefixed with [label], so
+    concurrent jobs stay distinguishable. Returns the command's stdout and
+    raises CalledProcessError when it fails.
+    """
+    proc = await asyncio.create_subprocess_exec(
+        *cmd, cwd=cwd, env=env,
+        stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE)
+    stderr_lines = []
+    
+    async def stream_stderr():
+        async for line in proc.stderr:
+            text = line.decode('utf-8', errors='replace').rstrip()
+            stderr_lines.append(text)
+            print(f"  [{label}] {text}")
     
     try:
-        print(f"Converting {md_path.name} to PDF...")
-        result = subprocess.run(pandoc_cmd, capture_output=True, text=True, check=True)
-        print(f"✓ Generated: {pdf_path}")
-        return pdf_path
+        stdout, _ = await asyncio.gather(proc.stdout.read(), stream_stderr())
+        await proc.wait()
+    except asyncio.CancelledError:
+        proc.kill()
+        await proc.wait()
+        raise
+    
+    stdout = stdout.decode('utf-8', errors='replace')
+    if proc.returncode != 0:
+        raise subprocess.CalledProcessError(proc.returncode, cmd, stdout, '\n'.join(stderr_lines))
+    return stdout
+
+async def run_xelatex(tex_path, build_dir, cwd, format_name=None):
+    """Run one xelatex pass, writing every output file into build_dir"""
+    cmd = [
+        'xelatex', '-interaction=nonstopmode', '-halt-on-error',
+        f'-output-directory={build_dir}'
+    ]
+    env = None
+    if format_name:
+        cmd.append(f'-fmt={format_name}')
+        env = get_format_environment()
+    cmd.append(str(tex_path))
+    await run_command(cmd, tex_path.stem, cwd=cwd, env=env)
+
+async def typeset_until_stable(tex_path, build_dir, cwd, format_name=None):
+    """Rerun xelatex until the aux, toc and outline files reach a fixed point
+    
+    The previous build's auxiliary files are the starting point, so a
+    document whose structure did not change settles after a single pass.
+    Returns the number of passes.
+    """
+    stem = tex_path.stem
+    before = hash_aux_files(build_dir, stem)
+    
+    for passes in range(1, MAX_LATEX_RUNS + 1):
+        try:
+            await run_xelatex(tex_path, build_dir, cwd, format_name)
+        except subprocess.CalledProcessError:
+            if not format_name:
+                raise
+            print(f"  [{stem}] Precompiled preamble failed, retrying without it")
+            format_name = None
+            await run_xelatex(tex_path, build_dir, cwd)
         
-    except subprocess.CalledProcessError as e:
-        print(f"✗ Error converting {md_path.name}:")
-        print(f"   Command: {' '.join(pandoc_cmd)}")
-        print(f"   Error: {e.stderr}")
-        return None
+        after = hash_aux_files(build_dir, stem)
+        if after == before:
+            break
+        before = after
+    
+    return passes
+
+async def convert_markdown_to_pdf_pandoc(md_file_path, output_dir, template, format_name=None):
+    """Convert markdown to PDF using pandoc
+    
+    pandoc writes the LaTeX source into a build directory kept per
+    document, and xelatex runs there only until its auxiliary files stop
+    changing. A document whose LaTeX source and embedded images are
+    unchanged is not typeset at all. With format_name, xelatex starts from the precompiled preamble.
+    Each call works on its own copy of the template in a private temporary
+    directory, so calls can run concurrently.
+    """
+    md_path = Path(md_file_path)
+    output_path = Path(output_dir)
+    
+    # Create output directory if it doesn't exist
+    output_path.mkdir(parents=True, exist_ok=True)
+    
+    # Define output PDF path
+    pdf_path = output_path / f"{md_path.stem}.pdf"
+    
+    # LaTeX intermediates survive between runs
+    build_dir = (output_path / BUILD_DIR_NAME / md_path.stem).resolve()
+    build_dir.mkdir(parents=True, exist_ok=True)
+    tex_path = build_dir / f"{md_path.stem}.tex"
+    state_path = build_dir / "state.json"
+    
+    with tempfile.TemporaryDirectory(prefix=f"pandoc-{md_path.stem}-") as job_dir:
+        template_path = create_pandoc_template(job_dir, template)
+        pandoc_cmd = pandoc_command(md_path, tex_path, template_path)
+        
+        try:
+            print(f"Converting {md_path.name} to PDF...")
+            with tracer.span("pandoc", md_path):
+                await run_command(pandoc_cmd, md_path.stem)
+            
+            inputs = {"tex": hash_file(tex_path), "images": hash_embedded_images(md_path)}
+            try:
+                state = json.loads(state_path.read_text(encoding='utf-8'))
+            except (OSError, ValueError):
+                state = {}
+            if pdf_path.exists() and state == inputs:
+                print(f"↷ Up to date: {pdf_path}")
+                return pdf_path
+            
+            # Images are referenced relative to the markdown file
+            with tracer.span("xelatex", md_path):
+                try:
+                    passes = await typeset_until_stable(
+                        tex_path, build_dir, md_path.parent.resolve(), format_name)
+                except subprocess.CalledProcessError:
+                    # Auxiliary files from an older version can break the first pass
+                    for extension in AUX_EXTENSIONS:
+                        (build_dir / f"{md_path.stem}{extension}").unlink(missing_ok=True)
+                    passes = await typeset_until_stable(
+                        tex_path, build_dir, md_path.parent.resolve(), format_name)
+            
+            shutil.copyfile(build_dir / f"{md_path.stem}.pdf", pdf_path)
+            state_path.write_text(json.dumps(inputs), encoding='utf-8')
+            print(f"✓ Generated: {pdf_path} ({passes} xelatex pass{'es' if passes > 1 else ''})")
+            return pdf_path
+            
+        except subprocess.CalledProcessError as e:
+            # stderr was already streamed; xelatex reports errors in its log on stdout
+            log_tail = ''.join((e.stdout or '').splitlines(True)[-20:])
+            print(f"✗ Error converting {md_path.name}:\n"
+                  f"   Command: {' '.join(e.cmd)}"
+                  + (f"\n   Error: {log_tail}" if log_tail else ''))
+            return None
+        except OSError as e:
+            # e.g. a tool that disappeared or an unwritable output directory
+            print(f"✗ Error converting {md_path.name}: {e}")
+            return None
+
+async def convert_documents(documents, template, format_name=None, jobs=1):
+    """Convert (markdown file, output directory) pairs, at most jobs at a time
+    
+    Returns the PDF path (or None on failure) for each document, in order.
+    """
+    semaphore = asyncio.Semaphore(max(1, jobs))
+    
+    async def convert(md_file, output_dir):
+        async with semaphore:
+            return await convert_markdown_to_pdf_pandoc(md_file, output_dir, template, format_name)
+    
+    return await asyncio.gather(*(convert(md_file, output_dir)
+                                  for md_file, output_dir in documents))
 
 def generate_batch_file():
     """Generate a Windows batch file for easier PDF generation"""
@@ -228,18 +473,37 @@ pause
     
     print("✓ Created generate_pdfs.bat for easy execution")
 
-def main():
+def parse_args(argv=None):
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description="Generate PDFs with pandoc and xelatex")
+    parser.add_argument('--jobs', '-j', type=int, default=os.cpu_count() or 1, metavar='N',
+                        help="number of documents to convert concurrently")
+    parser.add_argument('--trace', metavar='FILE',
+                        help="print per-stage timings and write a Chrome trace-event JSON file")
+    return parser.parse_args(argv)
+
+def main(argv=None):
     """Main function"""
+    args = parse_args(argv)
+    tracer.enabled = bool(args.trace)
+    
     print("🔄 PlayerMMO Documentation PDF Generator (Pandoc)")
     print("=" * 55)
     
     # Check for pandoc
-    if not check_pandoc():
+    with tracer.span("dependency check"):
+        pandoc_found = check_pandoc() and check_xelatex()
+    if not pandoc_found:
         return
     
-    # Create template
-    print("📄 Creating LaTeX template...")
-    template_path = create_pandoc_template()
+    # Every job writes its own copy of the template
+    template = get_pandoc_template()
+    
+    # Load the preamble's packages once for every document
+    print("⚙️  Precompiling the LaTeX preamble...")
+    format_name = build_preamble_format(template)
+    if format_name:
+        print(f"✓ Using preamble format {format_name}")
     
     # Define directories
     base_dir = Path(".")
@@ -276,10 +540,10 @@ def main():
         }
     ]
     
-    all_generated_pdfs = []
+    documents = []
     
     for section in sections:
-        print(f"\n📚 Processing {section['name']}...")
+        print(f"\n📚 Collecting {section['name']}...")
         print("-" * 40)
         
         source_path = Path(section["source"])
@@ -299,16 +563,15 @@ def main():
             print(f"⚠️  No markdown files found in {source_path}")
             continue
         
-        # Process each file
-        for md_file in md_files:
-            pdf_path = convert_markdown_to_pdf_pandoc(
-                md_file, 
-                section["output"], 
-                template_path
-            )
-            
-            if pdf_path:
-                all_generated_pdfs.append(pdf_path)
+        print(f"✓ {len(md_files)} file(s) queued")
+        documents.extend((md_file, section["output"]) for md_file in md_files)
+    
+    # Convert everything concurrently
+    jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+    print(f"\n📄 Converting {len(documents)} documents, {jobs} at a time...")
+    print("-" * 40)
+    results = asyncio.run(convert_documents(documents, template, format_name, jobs))
+    all_generated_pdfs = [pdf_path for pdf_path in results if pdf_path]
     
     # Generate summary
     print(f"\n📊 PDF Generation Summary")
@@ -326,16 +589,15 @@ def main():
             except Exception:
                 print(f"  • {pdf_file.name}")
     
-    # Cleanup
-    if template_path.exists():
-        template_path.unlink()
-    
     # Generate batch file for future use
     generate_batch_file()
     
     print(f"\n🎉 PDF generation complete!")
     print(f"📁 All PDFs saved to: {pdf_output_dir.absolute()}")
     print(f"🚀 Next time, you can run: generate_pdfs.bat")
+    
+    if args.trace:
+        tracer.report(args.trace)
 
 if __name__ == "__main__":
     main()
@@ -7,19 +7,25 @@ Creates PDFs from markdown files without external dependencies
 import os
 import sys
 import re
+import argparse
+import tempfile
 from pathlib import Path
 from datetime import datetime
 from html import escape
 
+from build_trace import tracer
+
 def install_required_packages():
     """Install required packages using pip"""
+    from generate_pdfs import probe_packages
+    
     packages = ['markdown', 'weasyprint']
     
-    for package in packages:
-        try:
-            __import__(package.replace('-', '_'))
+    # Spec and metadata lookups, cached per interpreter: nothing is imported
+    for package, version in probe_packages(packages).items():
+        if version is not None:
             print(f"✓ {package} already installed")
-        except ImportError:
+        else:
             print(f"📦 Installing {package}...")
             try:
                 import subprocess
@@ -31,99 +37,174 @@ def install_required_packages():
     
     return True
 
-def create_simple_html_converter():
-    """Create a simple markdown to HTML converter without external dependencies"""
+# Heading lines ("# " to "#### ")
+HEADING_PATTERN = re.compile(r'^(#{1,4}) (.+)$')
+
+# Any character that can start an inline construct
+INLINE_TRIGGER = re.compile(r'[*`\[]')
+
+# Inline patterns as (required text, pattern, replacement). They are applied
+# in this order, each to the result of the previous one, and the required
+# text lets lines that cannot match skip a pattern without running it.
+INLINE_PATTERNS = [
+    # Bold and italic
+    ('*', re.compile(r'\*\*(.+?)\*\*'), r'<strong>\1</strong>'),
+    ('*', re.compile(r'\*(.+?)\*'), r'<em>\1</em>'),
+    
+    # Inline code
+    ('`', re.compile(r'`(.+?)`'), r'<code>\1</code>'),
+    
+    # Links
+    ('](', re.compile(r'\[(.+?)\]\((.+?)\)'), r'<a href="\2">\1</a>'),
+    
+    # Images
+    ('![', re.compile(r'!\[(.+?)\]\((.+?)\)'), r'<img src="\2" alt="\1" style="max-width:100%;">'),
+]
+
+# List items ("- " or "* " at the start of the line)
+LIST_ITEM_PATTERN = re.compile(r'^[-*] (.+)$')
+
+def tokenize_line(line):
+    """Classify a markdown line as 'fence', 'list_item' or 'text'"""
+    stripped = line.strip()
+    if stripped.startswith('```'):
+        return 'fence'
+    if stripped.startswith(('- ', '* ')):
+        return 'list_item'
+    return 'text'
+
+def render_inline(line):
+    """Render headings, inline markup and list items for a single line"""
+    if line.startswith('#'):
+        line = HEADING_PATTERN.sub(
+            lambda m: f'<h{len(m.group(1))}>{m.group(2)}</h{len(m.group(1))}>', line)
+    
+    if INLINE_TRIGGER.search(line):
+        for required, pattern, replacement in INLINE_PATTERNS:
+            if required in line:
+                line = pattern.sub(replacement, line)
+    
+    if line.startswith(('- ', '* ')):
+        line = LIST_ITEM_PATTERN.sub(r'<li>\1</li>', line)
+    
+    return line
+
+# Code blocks larger than this are buffered on disk rather than in memory
+CODE_BUFFER_SIZE = 1024 * 1024
+
+class CodeBuffer:
+    """Lines of one code block, kept in memory until they outgrow
+    CODE_BUFFER_SIZE and then moved to a temporary file"""
+
+    def __init__(self):
+        self.lines = []
+        self.size = 0
+        self.spill = None
+
+    def append(self, line):
+        if self.spill is not None:
+            self.spill.write(line + '\n')
+            return
+        self.lines.append(line)
+        self.size += len(line)
+        if self.size > CODE_BUFFER_SIZE:
+            self.spill = tempfile.TemporaryFile(mode='w+', encoding='utf-8', newline='\n')
+            self.spill.writelines(line + '\n' for line in self.lines)
+            self.lines = []
+
+    def __iter__(self):
+        if self.spill is None:
+            yield from self.lines
+            return
+        self.spill.seek(0)
+        for line in self.spill:
+            yield line[:-1]
+
+    def close(self):
+        if self.spill is not None:
+            self.spill.close()
+
+def iter_html_lines(md_lines):
+    """Convert markdown lines to HTML lines, one at a time
+    
+    Lines are consumed lazily and HTML is yielded as soon as it is known,
+    so memory use does not grow with the document. Code blocks are held
+    until their closing fence (an unclosed block is dropped) in a buffer
+    that spills to disk when large.
+    """
+    in_list = False
+    code_buffer = None
     
-    def convert_markdown_to_html(md_content, title="Document"):
-        """Simple markdown to HTML conversion"""
-        
-        # Basic markdown patterns
-        patterns = [
-            # Headers
-            (r'^# (.+)$', r'<h1>\1</h1>'),
-            (r'^## (.+)$', r'<h2>\1</h2>'),
-            (r'^### (.+)$', r'<h3>\1</h3>'),
-            (r'^#### (.+)$', r'<h4>\1</h4>'),
-            
-            # Bold and italic
-            (r'\*\*(.+?)\*\*', r'<strong>\1</strong>'),
-            (r'\*(.+?)\*', r'<em>\1</em>'),
-            
-            # Code blocks (simple)
-            (r'```(\w+)?\n(.*?)\n```', r'<pre><code>\2</code></pre>'),
-            (r'`(.+?)`', r'<code>\1</code>'),
-            
-            # Links
-            (r'\[(.+?)\]\((.+?)\)', r'<a href="\2">\1</a>'),
-            
-            # Images
-            (r'!\[(.+?)\]\((.+?)\)', r'<img src="\2" alt="\1" style="max-width:100%;">'),
-            
-            # Lists (simple)
-            (r'^\- (.+)$', r'<li>\1</li>'),
-            (r'^\* (.+)$', r'<li>\1</li>'),
-        ]
-        
-        # Split into lines for processing
-        lines = md_content.split('\n')
-        html_lines = []
-        in_list = False
-        in_code_block = False
-        code_buffer = []
-        
-        for line in lines:
-            # Handle code blocks
+    for line in md_lines:
+        # Handle code blocks
+        if code_buffer is not None:
             if line.strip().startswith('```'):
-                if in_code_block:
-                    # End code block
-                    html_lines.append('<pre><code>')
-                    html_lines.extend(escape(l) for l in code_buffer)
-                    html_lines.append('</code></pre>')
-                    code_buffer = []
-                    in_code_block = False
-                else:
-                    # Start code block
-                    in_code_block = True
-                continue
-            
-            if in_code_block:
-                code_buffer.append(line)
-                continue
-            
-            # Handle lists
-            if line.strip().startswith(('- ', '* ')):
-                if not in_list:
-                    html_lines.append('<ul>')
-                    in_list = True
-                
-                # Apply basic patterns to line
-                processed_line = line
-                for pattern, replacement in patterns:
-                    processed_line = re.sub(pattern, replacement, processed_line, flags=re.MULTILINE)
-                html_lines.append(processed_line)
+                # End code block
+                yield '<pre><code>'
+                for code_line in code_buffer:
+                    yield escape(code_line)
+                yield '</code></pre>'
+                code_buffer.close()
+                code_buffer = None
             else:
-                if in_list:
-                    html_lines.append('</ul>')
-                    in_list = False
-                
-                # Apply patterns to line
-                processed_line = line
-                for pattern, replacement in patterns:
-                    processed_line = re.sub(pattern, replacement, processed_line, flags=re.MULTILINE)
-                
-                # Add paragraph tags for non-empty, non-header lines
-                if processed_line.strip() and not processed_line.strip().startswith('<h'):
-                    if not processed_line.strip().startswith('<'):
-                        processed_line = f'<p>{processed_line}</p>'
-                
-                html_lines.append(processed_line)
+                code_buffer.append(line)
+            continue
+        
+        kind = tokenize_line(line)
+        
+        if kind == 'fence':
+            # Start code block
+            code_buffer = CodeBuffer()
+            continue
+        
+        if kind == 'list_item':
+            if not in_list:
+                yield '<ul>'
+                in_list = True
+            yield render_inline(line)
+            continue
         
-        # Close any open list
         if in_list:
-            html_lines.append('</ul>')
+            yield '</ul>'
+            in_list = False
+        
+        processed_line = render_inline(line)
         
-        return '\n'.join(html_lines)
+        # Add paragraph tags for non-empty lines that are not already HTML
+        if processed_line.strip() and not processed_line.strip().startswith('<'):
+            processed_line = f'<p>{processed_line}</p>'
+        
+        yield processed_line
+    
+    if code_buffer is not None:
+        code_buffer.close()
+    
+    # Close any open list
+    if in_list:
+        yield '</ul>'
+
+def convert_markdown_to_html(md_content, title="Document"):
+    """Simple markdown to HTML conversion
+    
+    Every line is classified once and only the patterns it can match are
+    run, so plain prose costs a single character scan.
+    """
+    return '\n'.join(iter_html_lines(md_content.split('\n')))
+
+def read_markdown_lines(md_file):
+    """Yield the lines of an open markdown file without their newlines
     
+    Matches md_content.split('\\n'), including the empty last line of a
+    file that ends with a newline.
+    """
+    line = '\n'
+    for line in md_file:
+        yield line[:-1] if line.endswith('\n') else line
+    if line.endswith('\n'):
+        yield ''
+
+def create_simple_html_converter():
+    """Create a simple markdown to HTML converter without external dependencies"""
     return convert_markdown_to_html
 
 def create_css_styles():
@@ -283,24 +364,11 @@ def create_css_styles():
     </style>
     """
 
-def convert_markdown_to_html_file(md_file_path, output_dir):
-    """Convert markdown file to standalone HTML"""
-    
-    # Read markdown content
-    with open(md_file_path, 'r', encoding='utf-8') as f:
-        md_content = f.read()
-    
-    # Get converter
-    md_to_html = create_simple_html_converter()
-    
-    # Convert content
-    html_content = md_to_html(md_content)
-    
-    # Create complete HTML document
-    file_name = Path(md_file_path).stem
+def html_document_parts(file_name):
+    """Return the standalone HTML document template split around its content"""
     title = file_name.replace('_', ' ').replace('-', ' ').title()
     
-    html_document = f"""<!DOCTYPE html>
+    head = f"""<!DOCTYPE html>
 <html lang="en">
 <head>
     <meta charset="UTF-8">
@@ -316,7 +384,8 @@ def convert_markdown_to_html_file(md_file_path, output_dir):
     </div>
     
     <div class="content">
-        {html_content}
+        """
+    tail = """
     </div>
     
     <div class="document-footer">
@@ -325,25 +394,50 @@ def convert_markdown_to_html_file(md_file_path, output_dir):
     </div>
 </body>
 </html>"""
+    return head, tail
+
+def wrap_html_document(html_content, file_name):
+    """Wrap converted content in the standalone HTML document template"""
+    head, tail = html_document_parts(file_name)
+    return head + html_content + tail
+
+def convert_markdown_to_html_file(md_file_path, output_dir):
+    """Convert markdown file to standalone HTML
+    
+    The file is streamed: markdown is read, converted and written a line at
+    a time, so even very large generated documents use constant memory.
+    """
+    file_name = Path(md_file_path).stem
+    head, tail = html_document_parts(file_name)
     
     # Save HTML file
     output_path = Path(output_dir)
     output_path.mkdir(parents=True, exist_ok=True)
     
     html_file_path = output_path / f"{file_name}.html"
-    with open(html_file_path, 'w', encoding='utf-8') as f:
-        f.write(html_document)
+    with tracer.span("markdown parse", md_file_path):
+        with open(md_file_path, 'r', encoding='utf-8') as md_file, \
+                open(html_file_path, 'w', encoding='utf-8') as f:
+            f.write(head)
+            html_lines = iter_html_lines(read_markdown_lines(md_file))
+            f.write(next(html_lines, ''))
+            f.writelines('\n' + html_line for html_line in html_lines)
+            f.write(tail)
     
     return html_file_path
 
-def convert_html_to_pdf_with_weasyprint(html_file_path, pdf_file_path):
+def convert_html_to_pdf_with_weasyprint(html_file_path, pdf_file_path, document=None):
     """Convert HTML to PDF using WeasyPrint if available"""
+    document = document or html_file_path
     try:
         from weasyprint import HTML
         
         print(f"  Converting {html_file_path.name} to PDF...")
         html_doc = HTML(filename=str(html_file_path))
-        html_doc.write_pdf(str(pdf_file_path))
+        with tracer.span("weasyprint layout", document):
+            pages = html_doc.render()
+        with tracer.span("pdf write", document):
+            pages.write_pdf(str(pdf_file_path))
         
         return True
         
@@ -354,15 +448,64 @@ def convert_html_to_pdf_with_weasyprint(html_file_path, pdf_file_path):
         print(f"  Error with WeasyPrint: {e}")
         return False
 
-def generate_pdfs_simple():
+def convert_file(file_info, weasyprint_available):
+    """Convert one file to HTML and, when possible, to PDF
+
+    Returns (html_file, pdf_file); either is None when it was not produced.
+    """
+    file_path = Path(file_info["path"])
+    
+    # Convert to HTML
+    html_file = convert_markdown_to_html_file(file_path, file_info["output"])
+    
+    # Try to convert to PDF if WeasyPrint is available
+    if weasyprint_available:
+        pdf_file = file_info["output"] / f"{file_path.stem}.pdf"
+        if convert_html_to_pdf_with_weasyprint(html_file, pdf_file, document=file_path):
+            # Remove HTML file if PDF was created successfully
+            html_file.unlink()
+            return None, pdf_file
+    
+    print(f"  ✓ HTML created: {html_file}")
+    return html_file, None
+
+def watch_files(files_to_convert, weasyprint_available):
+    """Re-convert each watched markdown file as soon as it changes"""
+    from generate_pdfs import DirectoryWatcher
+    
+    by_path = {Path(info["path"]).resolve(): info for info in files_to_convert}
+    directories = sorted({(path.parent, False) for path in by_path})
+    watcher = DirectoryWatcher(directories)
+    mode = "inotify" if watcher.fd is not None else "polling"
+    print(f"\n👀 Watching {len(by_path)} files ({mode}), press Ctrl+C to stop...")
+    
+    try:
+        for changed in watcher.changes():
+            for path in sorted(changed):
+                file_info = by_path.get(path.resolve())
+                if file_info is None or not path.exists():
+                    continue
+                print(f"\n🔁 {file_info['name']} changed")
+                try:
+                    convert_file(file_info, weasyprint_available)
+                except Exception as e:
+                    print(f"  ❌ Error processing {path}: {e}")
+    except KeyboardInterrupt:
+        print("\n👋 Stopped watching")
+    finally:
+        watcher.close()
+
+def generate_pdfs_simple(watch=False, trace=None):
     """Simple PDF generation without complex dependencies"""
+    tracer.enabled = bool(trace)
     
     print("🔄 PlayerMMO Simple PDF Generator")
     print("=" * 40)
     
     # Try to install packages
     print("📦 Checking/installing packages...")
-    weasyprint_available = install_required_packages()
+    with tracer.span("dependency check"):
+        weasyprint_available = install_required_packages()
     
     # Define source directories and files
     base_dir = Path(".")
@@ -417,21 +560,11 @@ def generate_pdfs_simple():
         print(f"📝 Processing: {file_info['name']}")
         
         try:
-            # Convert to HTML
-            html_file = convert_markdown_to_html_file(file_path, file_info["output"])
-            html_files.append(html_file)
-            
-            # Try to convert to PDF if WeasyPrint is available
-            if weasyprint_available:
-                pdf_file = file_info["output"] / f"{file_path.stem}.pdf"
-                if convert_html_to_pdf_with_weasyprint(html_file, pdf_file):
-                    converted_files.append(pdf_file)
-                    # Remove HTML file if PDF was created successfully
-                    html_file.unlink()
-                else:
-                    print(f"  ✓ HTML created: {html_file}")
+            html_file, pdf_file = convert_file(file_info, weasyprint_available)
+            if pdf_file:
+                converted_files.append(pdf_file)
             else:
-                print(f"  ✓ HTML created: {html_file}")
+                html_files.append(html_file)
                 
         except Exception as e:
             print(f"  ❌ Error processing {file_path}: {e}")
@@ -487,11 +620,24 @@ For the latest version, visit the source repository.
     
     print("🎉 Documentation generation complete!")
     print(f"📖 Instructions saved to: {instructions_file}")
+    
+    if trace:
+        tracer.report(trace)
+    
+    if watch:
+        watch_files(files_to_convert, weasyprint_available)
 
 def main():
     """Main entry point"""
+    parser = argparse.ArgumentParser(description="Simple PlayerMMO PDF generator")
+    parser.add_argument('--watch', action='store_true',
+                        help="after generating, re-convert files as they change")
+    parser.add_argument('--trace', metavar='FILE',
+                        help="print per-stage timings and write a Chrome trace-event JSON file")
+    args = parser.parse_args()
+    
     try:
-        generate_pdfs_simple()
+        generate_pdfs_simple(watch=args.watch, trace=args.trace)
     except KeyboardInterrupt:
         print("\n\n❌ Generation cancelled by user")
     except Exception as e:
@@ -0,0 +1,804 @@
+#!/usr/bin/env python3
+"""
+Documentation Site Generator
+Renders the markdown sources into the docs/ site with the same markdown
+pipeline as generate_pdfs.py, rebuilding only the pages whose source, layout
+or linked files changed
+
+    docs-source/patterns/*.md    -> docs/patterns/<name>.html
+    docs-source/README.md        -> docs/playermmo.html
+    docs-source/summary_modelling.md -> docs/uml-modeling.html
+    README.md                    -> docs/main.html
+
+docs/index.html, 404.html and redirect.html are written by hand; only their
+links to the stylesheets and scripts are updated. A generated page that was
+edited by hand is not overwritten either, unless --force is given.
+
+style.css, highlight.css and main.js are published minified under
+content-hashed names, with a docs/_headers file that lets hosts which read
+it cache them forever.
+
+Run from the repository root:
+    python tools/generate_site.py [--force] [--watch] [--precompress]
+"""
+
+import os
+import re
+import sys
+import json
+import hashlib
+import string
+import argparse
+from pathlib import Path
+from datetime import datetime, timezone
+from string import Template
+from html import escape
+from html.parser import HTMLParser
+from urllib.parse import unquote
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import generate_pdfs
+from build_trace import tracer
+from precompress_site import precompress_site
+
+SOURCE_DIR = Path("docs-source")
+SITE_DIR = Path("docs")
+TEMPLATE_PATH = SOURCE_DIR / "templates" / "page.html"
+
+# Pages outside docs-source/patterns, as (source, output relative to SITE_DIR)
+SITE_PAGES = [
+    ("README.md", "main.html"),
+    ("docs-source/README.md", "playermmo.html"),
+    ("docs-source/summary_modelling.md", "uml-modeling.html"),
+]
+
+# Fingerprints of the pages generated last time (commit it with docs/)
+SITE_MANIFEST = Path("site_manifest.json")
+SITE_MANIFEST_VERSION = 1
+
+# Stylesheet for codehilite's Pygments markup, written next to style.css
+HIGHLIGHT_CSS = Path("assets/css/highlight.css")
+HIGHLIGHT_STYLE = 'default'
+
+# Stylesheets and scripts published minified under content-hashed names
+# (style.css -> style.<hash>.css), so they can be cached forever
+FINGERPRINTED_ASSETS = [
+    Path("assets/css/style.css"),
+    HIGHLIGHT_CSS,
+    Path("assets/js/main.js"),
+]
+ASSET_HASH_LENGTH = 10
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+# Comments and strings in CSS and JavaScript, matched in one pass so that
+# comment markers inside strings (and quotes inside comments) are left alone
+CSS_TOKEN_PATTERN = re.compile(r'/\*.*?\*/|"(?:\\.|[^"\\\n])*"|\'(?:\\.|[^\'\\\n])*\'', re.S)
+CSS_SPACE_PATTERN = re.compile(r'\s*([{};,])\s*|(:)\s+|\s+')
+
+# After these characters and keywords a / starts a regular expression literal
+JS_REGEX_PRECEDERS = set('(,=:[!&|?{};+-*%<>~^')
+JS_REGEX_KEYWORDS = {'return', 'typeof', 'case', 'do', 'else', 'in', 'of', 'new',
+                     'delete', 'void', 'throw', 'instanceof', 'yield', 'await'}
+
+# docs-source holds copies of the pattern summaries and the modelling guide.
+# Some still link relative to the original directory, so links that do not
+# resolve from the page's own directory are tried there, and links into it
+# go to the copies.
+MIRRORED_DIRS = {
+    Path("PlayerMMO/Summaries"): SOURCE_DIR / "patterns",
+    Path("Modelling"): SOURCE_DIR,
+}
+
+# Files linked from a page but not published with the site are served from GitHub
+GITHUB_URL = "https://github.com/Zed101000/Samenvatting"
+RAW_URL = "https://raw.githubusercontent.com/Zed101000/Samenvatting/main/"
+
+# href and src attributes in rendered HTML
+LINK_PATTERN = re.compile(r'\b(href|src)="([^"]*)"')
+
+# Published address of docs/, used in the sitemap
+SITE_URL = "https://zed101000.github.io/Samenvatting/"
+
+# Hand-written pages listed in the sitemap besides the generated ones
+SITEMAP_EXTRA_PAGES = [Path("index.html")]
+
+# Content hash changes remembered per page; the last one is its lastmod
+HISTORY_LENGTH = 20
+
+# Site search index: pages.json plus one shard per term prefix, so a search
+# only fetches the shards for the words typed
+SEARCH_DIR = Path("assets/search")
+SEARCH_PREFIX_LENGTH = 2
+SEARCH_SHARD_CHARS = set(string.ascii_lowercase + string.digits)
+
+# Score added per occurrence of a term, by where it occurs
+SEARCH_WEIGHTS = {"title": 10, "heading": 4, "code": 2, "text": 1}
+
+SEARCH_STOP_WORDS = frozenset("""
+    an and are as at be by can de een for from has het in is it its of on or
+    that the this to van was we with you
+""".split())
+
+WORD_PATTERN = re.compile(r'\w+')
+IDENTIFIER_PATTERN = re.compile(r'[A-Za-z_][A-Za-z0-9_]*')
+# Parts of a CamelCase identifier: HTTPRequestHandler -> HTTP, Request, Handler
+CAMEL_PART_PATTERN = re.compile(r'[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|[0-9]+')
+
+# Changes to other files (the manifest, editor backups) do not trigger --watch
+WATCH_SUFFIXES = {'.md', '.html', '.png', '.svg', '.jpg', '.jpeg', '.gif'}
+
+def page_name(md_file):
+    """Return the output name for a docs-source/patterns page
+
+    CamelCase names become kebab-case, *Patterns overviews become
+    <category>-overview and README becomes the patterns index.
+    """
+    stem = Path(md_file).stem
+    if stem == "README":
+        return "index.html"
+    if stem.endswith("Patterns") and stem != "Patterns":
+        return f"{stem[:-len('Patterns')].lower()}-overview.html"
+    return re.sub(r'(?<!^)(?=[A-Z])', '-', stem).lower() + ".html"
+
+def get_site_pages():
+    """Return every generated page as {"source", "output"} with repo-relative paths"""
+    pages = [{"source": Path(source), "output": Path(output)} for source, output in SITE_PAGES]
+    for md_file in sorted((SOURCE_DIR / "patterns").glob("*.md")):
+        pages.append({"source": md_file, "output": Path("patterns") / page_name(md_file)})
+    return [page for page in pages if page["source"].exists()]
+
+def resolve_link(source, target):
+    """Return the repository file or directory a relative link points to, or None"""
+    target = unquote(target)
+    for base in (source.parent, *MIRRORED_DIRS):
+        path = Path(os.path.normpath(base / target))
+        if not path.as_posix().startswith('../') and path.exists():
+            break
+    else:
+        return None
+
+    for original, copy in MIRRORED_DIRS.items():
+        if original in path.parents and (copy / path.relative_to(original)).exists():
+            return copy / path.relative_to(original)
+    return path
+
+def find_linked_files(source):
+    """Return the local images a page embeds, resolved as the page will link them"""
+    linked = set()
+    with open(source, 'r', encoding='utf-8') as f:
+        md_content = f.read()
+    for match in generate_pdfs.IMAGE_PATTERN.finditer(md_content):
+        src = match.group(1) or match.group(2)
+        if '://' in src or src.startswith(('data:', '#')):
+            continue
+        path = resolve_link(source, src.split('#')[0])
+        if path is not None and path.is_file():
+            linked.add(path)
+    return sorted(linked)
+
+def relative_url(from_output, to_output):
+    """Return the URL of one site page relative to another"""
+    return Path(os.path.relpath(to_output, from_output.parent)).as_posix()
+
+def rewrite_links(html_content, page, pages_by_source):
+    """Point relative links at the generated pages, published files or GitHub
+
+    Links to markdown sources that have a page go to that page. Other files
+    in the repository are not published with the site, so images link to
+    their raw file and everything else to its GitHub view.
+    """
+    def rewrite(match):
+        attribute, value = match.groups()
+        if not value or value.startswith(('#', '/', 'mailto:', 'data:')) or '://' in value:
+            return match.group(0)
+        target, _, fragment = value.partition('#')
+        fragment = f"#{fragment}" if fragment else ""
+        path = resolve_link(page["source"], target)
+        if path is None:
+            return match.group(0)
+
+        if path in pages_by_source:
+            url = relative_url(page["output"], pages_by_source[path]["output"]) + fragment
+        elif SITE_DIR in path.parents:
+            url = relative_url(page["output"], path.relative_to(SITE_DIR)) + fragment
+        elif attribute == 'src':
+            url = RAW_URL + path.as_posix()
+        else:
+            kind = "tree" if path.is_dir() else "blob"
+            url = f"{GITHUB_URL}/{kind}/main/{path.as_posix()}{fragment}"
+        return f'{attribute}="{escape(url)}"'
+
+    return LINK_PATTERN.sub(rewrite, html_content)
+
+def get_highlight_css():
+    """Return the stylesheet for codehilite's markup, or None without Pygments"""
+    try:
+        from pygments.formatters import HtmlFormatter
+    except ImportError:
+        return None
+    return HtmlFormatter(style=HIGHLIGHT_STYLE).get_style_defs('.codehilite') + "\n"
+
+def compute_site_inputs(pages, template):
+    """Digest everything besides a page's own files that shapes every page"""
+    inputs = {
+        "template": hashlib.sha256(template.encode('utf-8')).hexdigest(),
+        "extensions": generate_pdfs.MARKDOWN_EXTENSIONS,
+        "tools": generate_pdfs.get_tool_versions(),
+        "generator": generate_pdfs.hash_file(__file__),
+        # Links between pages depend on which pages exist
+        "pages": sorted([page["source"].as_posix(), page["output"].as_posix()] for page in pages)
+    }
+    encoded = json.dumps(inputs, sort_keys=True).encode('utf-8')
+    return hashlib.sha256(encoded).hexdigest()
+
+def compute_page_fingerprint(page, site_inputs):
+    """Fingerprint a page from its source, its linked files and the site inputs"""
+    digest = hashlib.sha256(site_inputs.encode('utf-8'))
+    digest.update(generate_pdfs.hash_file(page["source"]).encode('utf-8'))
+    for path in find_linked_files(page["source"]):
+        digest.update(f"{path.as_posix()}:{generate_pdfs.hash_file(path)}".encode('utf-8'))
+    return digest.hexdigest()
+
+def load_site_manifest(path=SITE_MANIFEST):
+    """Load the site manifest, starting fresh if it is missing or unreadable"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        if manifest.get("version") == SITE_MANIFEST_VERSION:
+            return manifest
+    except (OSError, ValueError):
+        pass
+    return {"version": SITE_MANIFEST_VERSION, "pages": {}}
+
+def save_site_manifest(manifest, path=SITE_MANIFEST):
+    """Write the site manifest atomically, sorted so diffs stay small"""
+    temp_path = Path(path).with_suffix('.tmp')
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+        f.write('\n')
+    os.replace(temp_path, path)
+
+class PageTextParser(HTMLParser):
+    """Collects the text of a generated page's article as heading, code or text"""
+
+    HEADINGS = {'h1', 'h2', 'h3', 'h4', 'h5', 'h6'}
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.in_article = False
+        self.heading_depth = 0
+        self.code_depth = 0
+        self.parts = {"heading": [], "code": [], "text": []}
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'article' and ('class', 'page-content') in attrs:
+            self.in_article = True
+        elif tag in self.HEADINGS:
+            self.heading_depth += 1
+        elif tag in ('code', 'pre'):
+            self.code_depth += 1
+
+    def handle_endtag(self, tag):
+        if tag == 'article':
+            self.in_article = False
+        elif tag in self.HEADINGS:
+            self.heading_depth = max(0, self.heading_depth - 1)
+        elif tag in ('code', 'pre'):
+            self.code_depth = max(0, self.code_depth - 1)
+
+    def handle_data(self, data):
+        if not self.in_article:
+            return
+        kind = "heading" if self.heading_depth else "code" if self.code_depth else "text"
+        self.parts[kind].append(data)
+
+def index_terms(text, kind):
+    """Yield the search terms in a piece of text
+
+    Words are lowercased; identifiers in code are also split into their
+    CamelCase parts so "State" finds ConcreteStateA.
+    """
+    if kind == "code":
+        for identifier in IDENTIFIER_PATTERN.findall(text):
+            yield identifier.lower()
+            parts = CAMEL_PART_PATTERN.findall(identifier)
+            if len(parts) > 1:
+                for part in parts:
+                    yield part.lower()
+        return
+    for word in WORD_PATTERN.findall(text.lower()):
+        yield word
+
+def shard_name(term):
+    """Return the index shard a term is stored in (the search script mirrors this)"""
+    return ''.join(c if c in SEARCH_SHARD_CHARS else '_' for c in term[:SEARCH_PREFIX_LENGTH])
+
+def build_search_index(pages):
+    """Build the page list and the sharded inverted index for the given pages
+
+    Each shard maps its sorted terms to flat [page, score, page, score, ...]
+    postings, so a prefix lookup is a binary search in one small file.
+    """
+    documents = []
+    postings = {}
+    for page in pages:
+        output = SITE_DIR / page["output"]
+        if not output.exists():
+            continue
+        number = len(documents)
+        title = generate_pdfs.get_document_title(page["source"])
+        documents.append({"url": page["output"].as_posix(), "title": title})
+
+        parser = PageTextParser()
+        with open(output, 'r', encoding='utf-8') as f:
+            parser.feed(f.read())
+        texts = [("title", title)]
+        texts += [(kind, text) for kind, parts in parser.parts.items() for text in parts]
+
+        for kind, text in texts:
+            for term in index_terms(text, kind):
+                if len(term) < 2 or term.isdigit() or term in SEARCH_STOP_WORDS:
+                    continue
+                scores = postings.setdefault(term, {})
+                scores[number] = scores.get(number, 0) + SEARCH_WEIGHTS[kind]
+
+    shards = {}
+    for term in sorted(postings):
+        shard = shards.setdefault(shard_name(term), {"terms": [], "postings": []})
+        shard["terms"].append(term)
+        shard["postings"].append([value for number, score in sorted(postings[term].items())
+                                  for value in (number, score)])
+    return documents, shards
+
+def json_text(data):
+    """Serialize index data as compact JSON"""
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':'))
+
+def page_url(output):
+    """Return the published URL of a page, directories for index pages"""
+    path = output.as_posix()
+    if output.name == "index.html":
+        path = path[:-len("index.html")]
+    return SITE_URL + path
+
+def sitemap_xml(entries):
+    """Build the sitemap for (url, lastmod) entries"""
+    urls = "".join(f"    <url>\n        <loc>{escape(url)}</loc>\n"
+                   f"        <lastmod>{lastmod}</lastmod>\n    </url>\n"
+                   for url, lastmod in sorted(entries))
+    return ('<?xml version="1.0" encoding="UTF-8"?>\n'
+            '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+            f"{urls}</urlset>\n")
+
+def robots_txt(current):
+    """Return robots.txt with its Sitemap line pointing at the generated sitemap"""
+    sitemap_line = f"Sitemap: {SITE_URL}sitemap.xml"
+    if current is None:
+        return f"User-agent: *\nAllow: /\n\n{sitemap_line}\n"
+    lines = [line for line in current.splitlines() if not line.lower().startswith("sitemap:")]
+    while lines and not lines[-1].strip():
+        lines.pop()
+    return "\n".join(lines + ["", sitemap_line]) + "\n"
+
+def write_text_if_changed(path, content):
+    """Write a text file unless it already holds content; return whether it was written"""
+    if path.exists() and path.read_text(encoding='utf-8') == content:
+        return False
+    with open(path, 'w', encoding='utf-8', newline='\n') as f:
+        f.write(content)
+    return True
+
+def minify_css(css):
+    """Strip comments and collapse whitespace in a stylesheet
+
+    Whitespace is only removed around braces, semicolons, commas and after
+    colons; strings are copied unchanged.
+    """
+    def collapse(text):
+        return CSS_SPACE_PATTERN.sub(lambda m: m.group(1) or m.group(2) or ' ', text)
+
+    parts = []
+    # Text between strings, with the comments in it dropped
+    text = []
+    position = 0
+    for match in CSS_TOKEN_PATTERN.finditer(css):
+        text.append(css[position:match.start()])
+        if not match.group().startswith('/*'):
+            parts += [collapse(' '.join(text)), match.group()]
+            text = []
+        position = match.end()
+    text.append(css[position:])
+    parts.append(collapse(' '.join(text)))
+    return ''.join(parts).replace(';}', '}').strip() + "\n"
+
+def skip_js_string(source, start):
+    """Return the index just past the string literal starting at start"""
+    quote = source[start]
+    i = start + 1
+    while i < len(source) and source[i] not in (quote, '\n'):
+        i += 2 if source[i] == '\\' else 1
+    return i + 1
+
+def skip_js_regex(source, start):
+    """Return the index just past the regular expression literal starting at start"""
+    i = start + 1
+    in_class = False
+    while i < len(source) and source[i] != '\n':
+        char = source[i]
+        if char == '\\':
+            i += 1
+        elif char == '[':
+            in_class = True
+        elif char == ']':
+            in_class = False
+        elif char == '/' and not in_class:
+            i += 1
+            break
+        i += 1
+    while i < len(source) and (source[i].isalnum() or source[i] == '_'):
+        i += 1
+    return i
+
+def regex_allowed(output):
+    """Check whether a / after the minified output so far starts a regex literal"""
+    text = ''.join(output[-16:]).rstrip(' \t')
+    if not text or text[-1] == '\n' or text[-1] in JS_REGEX_PRECEDERS:
+        return True
+    word = re.search(r'[A-Za-z_$][\w$]*$', text)
+    return word is not None and word.group() in JS_REGEX_KEYWORDS
+
+def minify_js(source):
+    """Strip comments, indentation and blank lines from a script
+
+    Line breaks are kept, so automatic semicolon insertion is unaffected;
+    strings, template literals and regular expression literals are copied
+    unchanged.
+    """
+    output = []
+    # Brace depth inside the ${...} of each open template literal
+    templates = []
+    i, length = 0, len(source)
+    line_start = True
+    while i < length:
+        char = source[i]
+        if line_start and char in ' \t\r\n':
+            i += 1
+            continue
+        line_start = False
+        if char == '\n':
+            while output and output[-1] in ' \t\r':
+                output.pop()
+            output.append('\n')
+            line_start = True
+            i += 1
+        elif source.startswith('//', i):
+            end = source.find('\n', i)
+            i = length if end < 0 else end
+        elif source.startswith('/*', i):
+            end = source.find('*/', i + 2)
+            i = length if end < 0 else end + 2
+        elif char in '"\'':
+            end = skip_js_string(source, i)
+            output.append(source[i:end])
+            i = end
+        elif char == '`' or (char == '}' and templates and templates[-1] == 0):
+            # Template text runs to the closing backtick or the next ${
+            if char == '}':
+                templates.pop()
+            end = i + 1
+            while end < length and source[end] != '`' and not source.startswith('${', end):
+                end += 2 if source[end] == '\\' else 1
+            if source.startswith('${', end):
+                templates.append(0)
+                end += 2
+            else:
+                end += 1
+            output.append(source[i:end])
+            i = end
+        elif char == '/' and regex_allowed(output):
+            end = skip_js_regex(source, i)
+            output.append(source[i:end])
+            i = end
+        else:
+            if templates and char == '{':
+                templates[-1] += 1
+            elif templates and char == '}':
+                templates[-1] -= 1
+            output.append(char)
+            i += 1
+    return ''.join(output).strip() + "\n"
+
+ASSET_MINIFIERS = {'.css': minify_css, '.js': minify_js}
+
+def hashed_asset_pattern(asset):
+    """Match references to an asset, hashed or not, in href and src attributes"""
+    stem, suffix = re.escape(asset.with_suffix('').as_posix()), re.escape(asset.suffix)
+    return re.compile(rf'(?<=["/]){stem}(?:\.[0-9a-f]{{{ASSET_HASH_LENGTH}}})?{suffix}(?=")')
+
+def rewrite_asset_references(html, asset_names):
+    """Point every reference to a fingerprinted asset at its current hashed name"""
+    for asset, hashed in asset_names.items():
+        html = hashed_asset_pattern(Path(asset)).sub(hashed, html)
+    return html
+
+def headers_file(asset_names):
+    """Build the _headers file that marks the hashed assets as immutable"""
+    rules = "".join(f"/{hashed}\n  Cache-Control: {IMMUTABLE_CACHE_CONTROL}\n\n"
+                    for hashed in sorted(asset_names.values()))
+    return ("# Generated by tools/generate_site.py. Hashed assets never change;\n"
+            "# a new version gets a new name.\n\n" + rules).rstrip("\n") + "\n"
+
+class Site:
+    """The generated pages with their manifest, for one build"""
+
+    def __init__(self, force=False):
+        self.force = force
+        self.pages = get_site_pages()
+        self.pages_by_source = {page["source"]: page for page in self.pages}
+        with open(TEMPLATE_PATH, 'r', encoding='utf-8') as f:
+            self.template = Template(f.read())
+        self.site_inputs = compute_site_inputs(self.pages, self.template.template)
+        self.manifest = load_site_manifest()
+        self.asset_names = self.manifest.get("assets", {})
+        self.changed = False
+
+    def output_path(self, page):
+        return SITE_DIR / page["output"]
+
+    def is_stale(self, page):
+        """Check whether a page must be regenerated
+
+        A page whose file no longer matches what was generated was edited
+        by hand; it is reported and left alone unless forced.
+        """
+        output = self.output_path(page)
+        entry = self.manifest["pages"].get(page["output"].as_posix())
+        if self.force or entry is None or not output.exists():
+            return True
+        if generate_pdfs.hash_file(output) != entry["output_hash"]:
+            print(f"⚠️  {output} was edited by hand, not regenerating it (use --force)")
+            return False
+        return entry["fingerprint"] != compute_page_fingerprint(page, self.site_inputs)
+
+    def build_page(self, page):
+        """Render one page into the site layout and record it in the manifest"""
+        output = self.output_path(page)
+        with tracer.span("markdown parse", page["source"]):
+            with open(page["source"], 'r', encoding='utf-8') as f:
+                html_content = generate_pdfs.render_markdown(f.read())
+
+        with tracer.span("html template", page["source"]):
+            html_content = rewrite_links(html_content, page, self.pages_by_source)
+            document = self.template.substitute(
+                title=escape(generate_pdfs.get_document_title(page["source"])),
+                content=html_content,
+                root="../" * (len(page["output"].parts) - 1),
+                source=escape(page["source"].as_posix()),
+                source_url=escape(f"{GITHUB_URL}/blob/main/{page['source'].as_posix()}"))
+            document = rewrite_asset_references(document, self.asset_names)
+            output.parent.mkdir(parents=True, exist_ok=True)
+            with open(output, 'w', encoding='utf-8', newline='\n') as f:
+                f.write(document)
+
+        self.manifest["pages"][page["output"].as_posix()] = {
+            "source": page["source"].as_posix(),
+            "fingerprint": compute_page_fingerprint(page, self.site_inputs),
+            "output_hash": hashlib.sha256(document.encode('utf-8')).hexdigest()
+        }
+        self.changed = True
+
+    def write_highlight_css(self):
+        """Write the Pygments stylesheet if it changed"""
+        css = get_highlight_css()
+        path = SITE_DIR / HIGHLIGHT_CSS
+        if css is None or (path.exists() and path.read_text(encoding='utf-8') == css):
+            return
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'w', encoding='utf-8', newline='\n') as f:
+            f.write(css)
+        print(f"✓ Generated: {path}")
+
+    def write_hashed_assets(self):
+        """Write each fingerprinted asset minified under its content-hashed name
+
+        Older hashed versions are removed, since no page links them any more.
+        """
+        asset_names = {}
+        for asset in FINGERPRINTED_ASSETS:
+            source = SITE_DIR / asset
+            if not source.exists():
+                continue
+            content = ASSET_MINIFIERS[asset.suffix](source.read_text(encoding='utf-8'))
+            digest = hashlib.sha256(content.encode('utf-8')).hexdigest()[:ASSET_HASH_LENGTH]
+            hashed = asset.with_name(f"{asset.stem}.{digest}{asset.suffix}")
+            if write_text_if_changed(SITE_DIR / hashed, content):
+                print(f"✓ Generated: {SITE_DIR / hashed} "
+                      f"({len(content):,} of {source.stat().st_size:,} bytes)")
+            hex_digits = '[0-9a-f]' * ASSET_HASH_LENGTH
+            for old in source.parent.glob(f"{asset.stem}.{hex_digits}{asset.suffix}"):
+                if old.name != hashed.name:
+                    old.unlink()
+            asset_names[asset.as_posix()] = hashed.as_posix()
+
+        if write_text_if_changed(SITE_DIR / "_headers", headers_file(asset_names)):
+            print(f"✓ Generated: {SITE_DIR / '_headers'}")
+        if asset_names != self.asset_names:
+            self.asset_names = asset_names
+            self.manifest["assets"] = asset_names
+            self.changed = True
+
+    def prepare(self):
+        """Write the stylesheets and scripts the pages link, before any page is built"""
+        self.write_highlight_css()
+        self.write_hashed_assets()
+
+    def update_asset_references(self):
+        """Point every page of the site, hand-written ones included, at the hashed assets
+
+        A generated page keeps its recorded hash in step, so it is not
+        mistaken for a page edited by hand.
+        """
+        for path in sorted(SITE_DIR.glob("*.html")) + sorted(SITE_DIR.glob("patterns/*.html")):
+            with open(path, 'r', encoding='utf-8', newline='') as f:
+                content = f.read()
+            updated = rewrite_asset_references(content, self.asset_names)
+            if updated == content:
+                continue
+            entry = self.manifest["pages"].get(path.relative_to(SITE_DIR).as_posix())
+            if entry and entry["output_hash"] == hashlib.sha256(content.encode('utf-8')).hexdigest():
+                entry["output_hash"] = hashlib.sha256(updated.encode('utf-8')).hexdigest()
+                self.changed = True
+            with open(path, 'w', encoding='utf-8', newline='') as f:
+                f.write(updated)
+            print(f"✓ Updated asset references: {path}")
+
+    def update_search_index(self):
+        """Rebuild the search index if any page changed since it was built"""
+        search_dir = SITE_DIR / SEARCH_DIR
+        digest = hashlib.sha256(self.site_inputs.encode('utf-8'))
+        for page in self.pages:
+            entry = self.manifest["pages"].get(page["output"].as_posix(), {})
+            digest.update(f"{page['output'].as_posix()}:{entry.get('output_hash')}".encode('utf-8'))
+        digest = digest.hexdigest()
+        if self.manifest.get("search") == digest and (search_dir / "pages.json").exists():
+            return
+
+        with tracer.span("search index"):
+            documents, shards = build_search_index(self.pages)
+            search_dir.mkdir(parents=True, exist_ok=True)
+            written = write_text_if_changed(search_dir / "pages.json", json_text(documents))
+            for name, shard in shards.items():
+                written += write_text_if_changed(search_dir / f"{name}.json", json_text(shard))
+            # The directory only holds the index, so shards no longer produced go
+            for path in search_dir.glob("*.json"):
+                if path.stem != "pages" and path.stem not in shards:
+                    path.unlink()
+
+        print(f"✓ Search index: {len(documents)} pages, "
+              f"{sum(len(shard['terms']) for shard in shards.values())} terms in "
+              f"{len(shards)} shards ({written} files written)")
+        self.manifest["search"] = digest
+        self.changed = True
+
+    def update_sitemap(self):
+        """Record each published page's content hash and regenerate sitemap.xml
+
+        A page's lastmod is the day its content last changed, so pages
+        that were regenerated with the same content keep their date.
+        """
+        history = self.manifest.setdefault("history", {})
+        today = datetime.now(timezone.utc).strftime('%Y-%m-%d')
+        outputs = [page["output"] for page in self.pages] + SITEMAP_EXTRA_PAGES
+        entries = []
+        for output in outputs:
+            path = SITE_DIR / output
+            if not path.exists():
+                continue
+            content_hash = generate_pdfs.hash_file(path)
+            changes = history.setdefault(output.as_posix(), [])
+            if not changes or changes[-1][0] != content_hash:
+                changes.append([content_hash, today])
+                del changes[:-HISTORY_LENGTH]
+                self.changed = True
+            entries.append((page_url(output), changes[-1][1]))
+
+        if write_text_if_changed(SITE_DIR / "sitemap.xml", sitemap_xml(entries)):
+            print(f"✓ Generated: {SITE_DIR / 'sitemap.xml'} ({len(entries)} pages)")
+        robots_path = SITE_DIR / "robots.txt"
+        current = robots_path.read_text(encoding='utf-8') if robots_path.exists() else None
+        if write_text_if_changed(robots_path, robots_txt(current)):
+            print(f"✓ Updated: {robots_path}")
+
+    def finish(self):
+        """Update what is derived from every page: asset references, the search index and the sitemap"""
+        self.update_asset_references()
+        self.update_search_index()
+        self.update_sitemap()
+
+    def save(self):
+        """Save the manifest if any page was generated"""
+        if self.changed:
+            save_site_manifest(self.manifest)
+            self.changed = False
+
+    def build(self):
+        """Generate every stale page; return the number of failures"""
+        rebuilt = failed = 0
+        try:
+            self.prepare()
+            for page in self.pages:
+                if not self.is_stale(page):
+                    continue
+                try:
+                    self.build_page(page)
+                    rebuilt += 1
+                    print(f"✓ Generated: {self.output_path(page)}")
+                except Exception as e:
+                    failed += 1
+                    print(f"✗ Error generating {self.output_path(page)}: {e}")
+            self.finish()
+        finally:
+            self.save()
+
+        print(f"📊 Site: generated {rebuilt}, failed {failed}, "
+              f"up to date {len(self.pages) - rebuilt - failed}")
+        return failed
+
+def watch_site():
+    """Regenerate the affected pages whenever a source, the layout or a linked file changes"""
+    site = Site()
+    directories = [(SOURCE_DIR, True), (Path("."), False)]
+    directories += sorted({(path.parent, False) for page in site.pages
+                           for path in find_linked_files(page["source"])})
+    watcher = generate_pdfs.DirectoryWatcher(directories)
+    mode = "inotify" if watcher.fd is not None else "polling"
+    print(f"\n👀 Watching the site sources ({mode}), press Ctrl+C to stop...")
+
+    try:
+        for changed in watcher.changes():
+            if not any(path.suffix in WATCH_SUFFIXES for path in changed):
+                continue
+            print(f"\n🔁 {len(changed)} file(s) changed")
+            # Fingerprints decide which pages are affected
+            Site().build()
+    except KeyboardInterrupt:
+        print("\n👋 Stopped watching")
+    finally:
+        watcher.close()
+
+def parse_args(argv=None):
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(
+        description="Generate the docs/ site pages from their markdown sources")
+    parser.add_argument('--force', action='store_true',
+                        help="regenerate every page, including pages edited by hand")
+    parser.add_argument('--watch', action='store_true',
+                        help="after generating, keep watching the sources and regenerate what changes")
+    parser.add_argument('--precompress', action='store_true',
+                        help="also write gzip and brotli copies of the changed site files")
+    parser.add_argument('--trace', metavar='FILE',
+                        help="print per-stage timings and write a Chrome trace-event JSON file")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    """Generate every page that is out of date"""
+    args = parse_args(argv)
+    tracer.enabled = bool(args.trace)
+
+    print("🌐 PlayerMMO Documentation Site Generator")
+    print("=" * 50)
+
+    failed = Site(args.force).build()
+    if args.precompress:
+        failed += precompress_site()
+
+    if args.trace:
+        tracer.report(args.trace)
+
+    if args.watch:
+        watch_site()
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Site Precompression
+Writes maximum-level gzip (.gz) and brotli (.br) copies of the text files in
+docs/, for static servers that serve precompressed files instead of
+compressing every response
+
+Only files whose content changed since the last run are compressed, in
+parallel. Brotli needs the optional brotli package; without it only .gz
+copies are written. The compressed copies are not committed.
+
+Run from the repository root:
+    python tools/precompress_site.py [--jobs N] [--force]
+"""
+
+import os
+import sys
+import json
+import gzip
+import hashlib
+import argparse
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from build_trace import tracer
+
+SITE_DIR = Path("docs")
+
+# Published files worth compressing
+COMPRESSED_SUFFIXES = {'.html', '.css', '.js', '.svg', '.json', '.xml', '.txt'}
+
+# Content hash of every file compressed last time, per encoding set
+PRECOMPRESS_MANIFEST = Path("precompress_manifest.json")
+PRECOMPRESS_MANIFEST_VERSION = 1
+
+def brotli_available():
+    """Check whether the optional brotli package can be imported"""
+    try:
+        import brotli  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+def get_encodings():
+    """Return the file suffixes of the encodings this machine can write"""
+    return ['.gz', '.br'] if brotli_available() else ['.gz']
+
+def compress(data, encoding):
+    """Compress bytes at the encoding's highest level"""
+    if encoding == '.br':
+        import brotli
+
+        return brotli.compress(data, mode=brotli.MODE_TEXT, quality=11)
+    # mtime=0 keeps the output identical for identical input
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+def compress_file(path, encodings):
+    """Write the compressed copies of one file; return (path, hash, sizes)
+
+    A copy that would not be smaller than the file is not kept, so servers
+    fall back to the file itself.
+    """
+    path = Path(path)
+    data = path.read_bytes()
+    sizes = {}
+    for encoding in encodings:
+        target = path.with_name(path.name + encoding)
+        compressed = compress(data, encoding)
+        if len(compressed) < len(data):
+            # Replaced in one step, so a server never reads a partial copy
+            temporary = target.with_name(target.name + '.tmp')
+            temporary.write_bytes(compressed)
+            os.replace(temporary, target)
+            sizes[encoding] = len(compressed)
+        elif target.exists():
+            target.unlink()
+    return str(path), hashlib.sha256(data).hexdigest(), sizes
+
+def find_site_files(site_dir=SITE_DIR):
+    """Return every file in the site that gets compressed copies"""
+    return sorted(path for path in site_dir.rglob("*")
+                  if path.is_file() and path.suffix in COMPRESSED_SUFFIXES)
+
+def load_precompress_manifest(encodings):
+    """Load the manifest, or an empty one if it is missing or was made for other encodings"""
+    empty = {"version": PRECOMPRESS_MANIFEST_VERSION, "encodings": encodings, "files": {}}
+    try:
+        with open(PRECOMPRESS_MANIFEST, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return empty
+    if manifest.get("version") != PRECOMPRESS_MANIFEST_VERSION \
+            or manifest.get("encodings") != encodings:
+        return empty
+    return manifest
+
+def save_precompress_manifest(manifest):
+    """Save the manifest"""
+    with open(PRECOMPRESS_MANIFEST, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+def is_current(path, entry):
+    """Check whether a file's compressed copies match its content"""
+    if entry is None or any(not path.with_name(path.name + encoding).exists()
+                            for encoding in entry["encodings"]):
+        return False
+    return hashlib.sha256(path.read_bytes()).hexdigest() == entry["hash"]
+
+def remove_orphans(site_dir, files):
+    """Delete compressed copies whose file is gone; return how many"""
+    sources = {str(path) for path in files}
+    removed = 0
+    for encoding in ('.gz', '.br'):
+        for copy in site_dir.rglob(f"*{encoding}"):
+            if copy.with_suffix('').suffix in COMPRESSED_SUFFIXES \
+                    and str(copy.with_suffix('')) not in sources:
+                copy.unlink()
+                removed += 1
+    return removed
+
+def precompress_site(jobs=None, force=False, site_dir=SITE_DIR):
+    """Compress every changed site file in parallel; return the number of failures"""
+    encodings = get_encodings()
+    if '.br' not in encodings:
+        print("⚠️  brotli is not installed, writing gzip copies only (pip install brotli)")
+    manifest = load_precompress_manifest(encodings)
+    files = find_site_files(site_dir)
+    stale = [path for path in files
+             if force or not is_current(path, manifest["files"].get(str(path)))]
+
+    compressed = failed = saved = 0
+    with tracer.span("precompress"):
+        if stale:
+            with ProcessPoolExecutor(max_workers=jobs or os.cpu_count() or 1) as executor:
+                futures = {executor.submit(compress_file, str(path), encodings): path
+                           for path in stale}
+                for future, path in futures.items():
+                    try:
+                        name, content_hash, sizes = future.result()
+                    except Exception as e:
+                        failed += 1
+                        manifest["files"].pop(str(path), None)
+                        print(f"✗ Error compressing {path}: {e}")
+                        continue
+                    manifest["files"][name] = {"hash": content_hash, "encodings": sorted(sizes)}
+                    compressed += 1
+                    saved += sum(path.stat().st_size - size for size in sizes.values())
+
+        for name in list(manifest["files"]):
+            if not Path(name).exists():
+                del manifest["files"][name]
+        removed = remove_orphans(site_dir, files)
+    save_precompress_manifest(manifest)
+
+    print(f"📦 Precompressed {compressed} files ({', '.join(encodings)}), "
+          f"saving {saved:,} bytes, up to date {len(files) - len(stale)}, failed {failed}"
+          + (f", removed {removed} orphaned copies" if removed else ""))
+    return failed
+
+def parse_args(argv=None):
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(
+        description="Write gzip and brotli copies of the changed docs/ files")
+    parser.add_argument('--jobs', '-j', type=int, default=os.cpu_count() or 1, metavar='N',
+                        help="number of parallel workers")
+    parser.add_argument('--force', action='store_true',
+                        help="compress every file, even unchanged ones")
+    parser.add_argument('--trace', metavar='FILE',
+                        help="print per-stage timings and write a Chrome trace-event JSON file")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    """Precompress the site"""
+    args = parse_args(argv)
+    tracer.enabled = bool(args.trace)
+    failed = precompress_site(max(1, args.jobs), args.force)
+    if args.trace:
+        tracer.report(args.trace)
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
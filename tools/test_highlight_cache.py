@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Tests for the SQLite highlight cache in highlight_cache.py
+
+Run from the repository root:
+    python -m pytest tools/test_highlight_cache.py
+"""
+
+import os
+import time
+
+import pytest
+
+import highlight_cache
+from highlight_cache import HighlightCache
+
+@pytest.fixture
+def cache(tmp_path):
+    """A cache in a private file"""
+    return HighlightCache(tmp_path / "highlight.sqlite3")
+
+def test_put_then_get(cache):
+    cache.put("key", "<pre>code</pre>")
+    assert cache.get("key") == "<pre>code</pre>"
+    assert cache.get("missing") is None
+
+def test_recent_hits_do_not_write(cache):
+    cache.put("key", "<pre>code</pre>")
+    changes = cache.connection.total_changes
+    for _ in range(10):
+        cache.get("key")
+    assert cache.connection.total_changes == changes
+
+def test_old_hits_record_their_use(cache):
+    cache.put("key", "<pre>code</pre>")
+    stale = time.time() - highlight_cache.USE_TIME_RESOLUTION - 1
+    with cache.connection:
+        cache.connection.execute("UPDATE highlights SET used = ?", (stale,))
+    cache.get("key")
+    used = cache.connection.execute("SELECT used FROM highlights").fetchone()[0]
+    assert used > stale
+
+def test_eviction_drops_least_recently_used(tmp_path):
+    cache = HighlightCache(tmp_path / "highlight.sqlite3", max_bytes=100)
+    cache.put("old", "x" * 40)
+    cache.put("new", "y" * 40)
+    cache.put("newest", "z" * 40)
+    assert cache.get("old") is None
+    assert cache.get("newest") == "z" * 40
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="needs os.fork")
+def test_forked_child_opens_its_own_connection(cache):
+    cache.put("key", "<pre>code</pre>")
+    parent_connection = cache.connection
+    pid = os.fork()
+    if pid == 0:
+        ok = cache.get("key") == "<pre>code</pre>" \
+            and cache.connection is not parent_connection \
+            and parent_connection in cache.inherited
+        os._exit(0 if ok else 1)
+    _, status = os.waitpid(pid, 0)
+    assert os.waitstatus_to_exitcode(status) == 0
+    assert cache.connection is parent_connection
+    assert cache.get("key") == "<pre>code</pre>"
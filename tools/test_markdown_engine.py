@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Tests for the reused markdown engine in generate_pdfs.py
+render_markdown() must give every document the output a fresh
+markdown.Markdown would, whatever was converted before it
+
+Run from the repository root:
+    python -m pytest tools/test_markdown_engine.py
+"""
+
+import pytest
+
+markdown = pytest.importorskip("markdown")
+pygments = pytest.importorskip("pygments")
+
+from markdown.extensions import codehilite
+
+import generate_pdfs
+from highlight_cache import HighlightCache, install_highlight_cache
+
+TOC_DOCUMENT = """# Observer
+
+[TOC]
+
+## Structure
+
+### Example
+
+## Structure
+
+### Example
+
+## Consequences
+"""
+
+FOOTNOTE_DOCUMENT = """# Strategy
+
+Strategies are interchangeable[^swap] and chosen at run time[^runtime].
+
+[^swap]: Every strategy implements the same interface.
+[^runtime]: The context holds a reference it can replace.
+"""
+
+COMBINED_DOCUMENT = """# Singleton
+
+[TOC]
+
+## Structure
+
+One instance[^one] is created lazily.
+
+```python
+class Singleton:
+    _instance = None
+```
+
+## Structure
+
+A second note[^two] with the same heading as before.
+
+[^one]: Per process.
+[^two]: Repeated headings get unique ids.
+"""
+
+@pytest.fixture(autouse=True)
+def fresh_engine(tmp_path, monkeypatch):
+    """Start every test without an engine, highlighting through a private cache"""
+    # install_highlight_cache() keeps an installed cache, so unwrap it first;
+    # monkeypatch puts the previous one back afterwards
+    monkeypatch.setattr(codehilite, "highlight", pygments.highlight)
+    install_highlight_cache(HighlightCache(tmp_path / "highlight.sqlite3"))
+    monkeypatch.setattr(generate_pdfs, "_markdown_engine", None)
+
+def render_fresh(md_content):
+    """Convert with a new engine, as before the engine was reused"""
+    return markdown.Markdown(extensions=generate_pdfs.MARKDOWN_EXTENSIONS).convert(md_content)
+
+@pytest.mark.parametrize("sequence", [
+    [TOC_DOCUMENT, TOC_DOCUMENT],
+    [FOOTNOTE_DOCUMENT, FOOTNOTE_DOCUMENT],
+    [TOC_DOCUMENT, FOOTNOTE_DOCUMENT, COMBINED_DOCUMENT],
+    [COMBINED_DOCUMENT, TOC_DOCUMENT, COMBINED_DOCUMENT, FOOTNOTE_DOCUMENT],
+], ids=["toc-twice", "footnotes-twice", "toc-footnotes-combined", "mixed"])
+def test_back_to_back_documents_match_fresh_engine(sequence):
+    for md_content in sequence:
+        assert generate_pdfs.render_markdown(md_content) == render_fresh(md_content)
+
+def test_engine_is_reused():
+    generate_pdfs.render_markdown(TOC_DOCUMENT)
+    engine = generate_pdfs._markdown_engine
+    generate_pdfs.render_markdown(FOOTNOTE_DOCUMENT)
+    assert generate_pdfs._markdown_engine is engine
+
+def test_toc_does_not_keep_previous_headings():
+    generate_pdfs.render_markdown(TOC_DOCUMENT)
+    html = generate_pdfs.render_markdown(COMBINED_DOCUMENT)
+    assert "Consequences" not in html
+    # Ids restart for the new document instead of continuing structure_2, ...
+    assert 'id="structure"' in html and 'id="structure_1"' in html
+    assert 'id="structure_2"' not in html
+
+def test_footnotes_do_not_carry_over():
+    generate_pdfs.render_markdown(FOOTNOTE_DOCUMENT)
+    html = generate_pdfs.render_markdown(COMBINED_DOCUMENT)
+    assert "Every strategy implements the same interface." not in html
+    assert html.count('class="footnote-backref"') == 2
+
+def test_each_test_highlights_through_its_own_cache(tmp_path):
+    generate_pdfs.render_markdown(COMBINED_DOCUMENT)
+    assert codehilite.highlight.highlight_cache.path == tmp_path / "highlight.sqlite3"